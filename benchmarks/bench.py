@@ -0,0 +1,233 @@
+"""Scaling benchmarks of pyplot on synthetic script trees.
+
+A synthetic root directory with a configurable number of scripts, nesting
+depth, sub-namespaces and import weight per script is generated in a
+temporary directory. Every measurement runs in a fresh interpreter whose
+configuration and cache point into that directory. Results are written as
+JSON and can be compared against a saved baseline:
+
+    $ python benchmarks/bench.py --scripts 1000 --output results.json
+    $ python benchmarks/bench.py --scripts 1000 --baseline results.json
+"""
+from __future__ import print_function, division
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from textwrap import dedent
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARGPARSE_SCRIPT = dedent(
+    '''\
+    """synthetic script {index} with get_parser"""
+    import argparse
+
+    _WEIGHT = sum(range({weight}))
+
+
+    def get_parser(add_help=True):
+        parser = argparse.ArgumentParser(add_help=add_help)
+        parser.add_argument('-s', '--start', type=int, default=0, help='first iteration')
+        parser.add_argument('--mode', choices=['a', 'b'], default='a')
+        parser.add_argument('files', nargs='*')
+        return parser
+
+
+    def main(args):
+        pass
+    '''
+)
+ARGV_SCRIPT = dedent(
+    '''\
+    """synthetic script {index} using sys.argv"""
+    import sys
+
+    _WEIGHT = sum(range({weight}))
+
+
+    def main():
+        pass
+    '''
+)
+
+MEASURE_PARSER = dedent(
+    '''\
+    import json, time
+    start = time.perf_counter()
+    from pyplot import common, pyplot, telemetry
+    pyplot.get_parser(common.ROOT_DIRECTORIES, common.SUB_DIRECTORIES)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    pyplot.get_parser(common.ROOT_DIRECTORIES, common.SUB_DIRECTORIES)
+    warm = time.perf_counter() - start
+    rss = telemetry.peak_rss()
+    print(json.dumps({'get_parser_cold': cold, 'get_parser_warm': warm,
+                      'get_parser_rss': rss}))
+    '''
+)
+
+RUN_MAIN = 'import sys; from pyplot.__main__ import main; sys.argv[0] = "pyplot"; main()'
+
+
+def generate_tree(base, scripts, depth, subs, weight):
+    """Create the synthetic script roots below `base`, return `(roots, subs, commands)`
+
+    The scripts are distributed evenly over one root and `subs` sub
+    directories, each containing a chain of `depth` nested directories.
+    `commands` are the command paths of the scripts with `get_parser`.
+    """
+    tops = [os.path.join(base, 'root')]
+    tops += [os.path.join(base, 'sub{0}'.format(index)) for index in range(subs)]
+    directories = []
+    for top in tops:
+        dirname = top
+        for level in range(depth + 1):
+            os.makedirs(dirname)
+            directories.append(dirname)
+            dirname = os.path.join(dirname, 'level{0}'.format(level + 1))
+    commands = []
+    for index in range(scripts):
+        template = ARGPARSE_SCRIPT if index % 2 else ARGV_SCRIPT
+        dirname = directories[index % len(directories)]
+        with open(os.path.join(dirname, 'plot{0}.py'.format(index)), 'w') as file_:
+            file_.write(template.format(index=index, weight=weight * 1000))
+        if template is ARGPARSE_SCRIPT:
+            path = os.path.relpath(dirname, base).split(os.sep)
+            if dirname.startswith(tops[0]):  # the root itself is no command
+                path = path[1:]
+            commands.append(path + ['plot{0}'.format(index)])
+    return tops[:1], tops[1:], commands
+
+
+def write_config(home, roots, subs):
+    """Write the pyplot configuration file into `home`"""
+    with open(os.path.join(home, '.pyplot.cfg'), 'w') as file_:
+        file_.write('[include]\nroot_directories =\n')
+        file_.writelines('\t{0}\n'.format(dirname) for dirname in roots)
+        file_.write('sub_directories =\n')
+        file_.writelines('\t{0}\n'.format(dirname) for dirname in subs)
+
+
+class Runner(object):
+    """Runs commands in fresh interpreters using the synthetic configuration"""
+
+    def __init__(self, home):
+        self.env = dict(os.environ, HOME=home, XDG_CACHE_HOME=os.path.join(home, 'cache'),
+                        PYTHONPATH=REPO, PYTHONDONTWRITEBYTECODE='1')
+
+    def run(self, code, args=(), env=None):
+        """Return wall time and stdout of running `code`"""
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', code] + list(args),
+                                 env=dict(self.env, **(env or {})),
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 universal_newlines=True)
+        wall = time.perf_counter() - start
+        if process.returncode not in (0, None):
+            raise RuntimeError(process.stderr)
+        return wall, process.stdout
+
+    def pyplot(self, *args):
+        return self.run(RUN_MAIN, args)[0]
+
+    def complete(self, line):
+        """Return wall time and the completions of `line`"""
+        filename = os.path.join(self.env['HOME'], 'completions')
+        env = {'_ARGCOMPLETE': '1', 'COMP_LINE': line, 'COMP_POINT': str(len(line)),
+               '_ARGCOMPLETE_STDOUT_FILENAME': filename}
+        wall = self.run(RUN_MAIN, env=env)[0]
+        with open(filename, 'r') as file_:
+            return wall, file_.read().split('\013')
+
+
+def measure(runner, command):
+    """Return a dictionary of all metrics, times in seconds and memory in MiB
+
+    The options of the script at the command path `command` are completed."""
+    results = {}
+    results['update_full'] = runner.pyplot('configure', 'update', '--full')
+    results['update_incremental'] = runner.pyplot('configure', 'update')
+    results.update(json.loads(runner.run(MEASURE_PARSER)[1].strip().splitlines()[-1]))
+    results['help'] = runner.pyplot('--help')
+    results['run'] = runner.pyplot('plot0')  # plot0 always lives in the root directory
+    line = 'pyplot {0} --'.format(' '.join(command))
+    results['completion'], completions = runner.complete(line)
+    if '--start' not in completions:  # option of the script, not of `pyplot`
+        raise RuntimeError('the script options are not completed for ' + line)
+    return results
+
+
+def measure_clean(runner):
+    """Return the time of `configure clean`, this invalidates the tree"""
+    return runner.pyplot('configure', 'clean')
+
+
+def compare(results, baseline, threshold):
+    """Return the metrics which are slower than `baseline` by `threshold`"""
+    regressions = []
+    for name, value in sorted(results.items()):
+        if name in baseline and value > baseline[name] * (1 + threshold):
+            regressions.append((name, baseline[name], value))
+    return regressions
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--scripts', type=int, default=200, help='number of scripts')
+    parser.add_argument('--depth', type=int, default=2, help='nesting depth of directories')
+    parser.add_argument('--subs', type=int, default=2, help='number of sub-namespaces')
+    parser.add_argument('--import-weight', type=int, default=10,
+                        help='work done at import, in thousands of additions')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='repetitions, the minimum is reported')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative slowdown compared to the baseline')
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+    base = tempfile.mkdtemp(prefix='pyplot-bench-')
+    try:
+        roots, subs, commands = generate_tree(base, args.scripts, args.depth, args.subs,
+                                              args.import_weight)
+        if not commands:
+            raise SystemExit('at least two scripts are needed')
+        write_config(base, roots, subs)
+        runner = Runner(base)
+        repetitions = [measure(runner, commands[-1]) for _ in range(args.repeat)]
+        results = {name: min(result[name] for result in repetitions)
+                   for name in repetitions[0]}
+        results['clean'] = measure_clean(runner)
+    finally:
+        shutil.rmtree(base)
+    width = max(len(name) for name in results)
+    for name, value in sorted(results.items()):
+        unit = 'MiB' if name.endswith('rss') else 'ms'
+        value = value if unit == 'MiB' else value * 1000
+        print('{name:{width}}  {value:10.1f} {unit}'.format(name=name, width=width,
+                                                            value=value, unit=unit))
+    if args.output:
+        with open(args.output, 'w') as file_:
+            json.dump({'parameters': vars(args), 'results': results}, file_, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as file_:
+            baseline = json.load(file_)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new in regressions:
+            print('Regression of {0}: {1:.4g} -> {2:.4g}'.format(name, old, new),
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,12 @@
 """Package to manage scripts"""
 from .__version__ import __version__
+
+
+def run(name, argv=()):
+    """Run the script `name` with the arguments `argv` in this process
+
+    `name` is the path of commands as typed after `pyplot`, e.g.
+    `run('sub1 toyplot', ['-s', '3'])`. See `runner.Runner.run`.
+    """
+    from .runner import run as run_  # imported lazily to keep completion fast
+    return run_(name, argv)
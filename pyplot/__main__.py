@@ -1,7 +1,10 @@
 # PYTHON_ARGCOMPLETE_OK
 """entry point for the console script"""
-from .pyplot import ifmain_wrapper
+from .complete import complete
 
 
 def main():
+    if complete():  # answer tab-completion without building the parser
+        raise SystemExit(0)
+    from .pyplot import ifmain_wrapper
     raise SystemExit(ifmain_wrapper())
@@ -0,0 +1,229 @@
+"""Run a job file of script invocations concurrently
+
+The job file is a TOML file with a table for every job::
+
+    [jobs.spectrum]
+    command = "sub1 toyplot --start 3"
+
+    [jobs.overview]
+    command = ["toyplotwparse", "-s", "1"]
+    after = ["spectrum"]
+
+`command` holds the arguments as they would be passed to `pyplot`, `after`
+lists jobs which have to finish successfully before the job is started.
+Independent jobs run concurrently in a pool of worker processes; every
+worker builds the parser once and keeps imported scripts for later jobs.
+"""
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import contextlib
+import io
+import os
+import shlex
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from . import common
+
+_PARSER = None
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('jobfile', help='TOML file describing the jobs')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='number of worker processes')
+    return parser
+
+
+class JobError(Exception):
+    """Raised for invalid job files"""
+
+
+def read_jobs(filename):
+    """Return a dictionary `name -> (argv, after)` of the jobs in `filename`"""
+    if tomllib is None:
+        raise JobError('reading job files requires Python 3.11 or `tomli`')
+    with open(filename, 'rb') as file_:
+        content = tomllib.load(file_)
+    jobs = {}
+    for name, job in content.get('jobs', {}).items():
+        try:
+            command = job['command']
+        except KeyError:
+            raise JobError('job {0} has no command'.format(name))
+        argv = shlex.split(command) if isinstance(command, str) else list(command)
+        jobs[name] = (argv, list(job.get('after', ())))
+    for name, (_, after) in jobs.items():
+        for dependency in after:
+            if dependency not in jobs:
+                raise JobError('job {0} depends on unknown job {1}'.format(name, dependency))
+    check_acyclic(jobs)
+    return jobs
+
+
+def check_acyclic(jobs):
+    """Raise `JobError` if the dependencies of `jobs` contain a cycle"""
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise JobError('cyclic dependency: ' + ' -> '.join(path + [name]))
+        state[name] = 'visiting'
+        for dependency in jobs[name][1]:
+            visit(dependency, path + [name])
+        state[name] = 'done'
+    for name in jobs:
+        visit(name, [])
+
+
+def load_parser():
+    """Build the parser of all scripts, used as initializer of the workers"""
+    global _PARSER
+    from . import pyplot  # avoid circular import
+    _PARSER = pyplot.get_parser(common.ROOT_DIRECTORIES, common.SUB_DIRECTORIES)
+    return _PARSER
+
+
+def resolve(parser, argv):
+    """Return the error message if `argv` can't be parsed, else `None`
+
+    Arguments exiting successfully while parsing, like `--help`, are valid."""
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+            parser.parse_args(argv)
+    except SystemExit as exc:
+        if not exc.code:
+            return None
+        lines = stderr.getvalue().strip().splitlines()
+        return lines[-1] if lines else 'exit status {0}'.format(exc.code)
+    return None
+
+
+def run_job(argv):
+    """Run `argv` in the worker, return `(returncode, stdout, stderr, wall, cpu)`"""
+    from . import pyplot  # avoid circular import
+    stdout, stderr = io.StringIO(), io.StringIO()
+    old_argv = sys.argv
+    sys.argv = ['pyplot'] + list(argv)
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    returncode = 0
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                pyplot.main(_PARSER.parse_args(argv))
+            except SystemExit as exc:
+                returncode = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        sys.argv = old_argv
+    return (returncode, stdout.getvalue(), stderr.getvalue(),
+            time.perf_counter() - start_wall, time.process_time() - start_cpu)
+
+
+def run_jobs(jobs, max_workers=None, report=print):
+    """Run the `jobs` respecting their dependencies, return their results
+
+    The result of each job is a dictionary with `status` ('ok', 'failed' or
+    'skipped'), `returncode`, `wall` and `cpu` time. The buffered output of a
+    job is passed to `report` as soon as it finished. If a worker process
+    dies, the pool is unusable and all unfinished jobs are failed.
+    """
+    results = {}
+    broken = False
+    waiting = {name: set(after) for name, (_, after) in jobs.items()}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=load_parser) as executor:
+        running = {}
+        while waiting or running:
+            for name in [name for name, after in waiting.items() if not after]:
+                del waiting[name]
+                running[executor.submit(run_job, jobs[name][0])] = name
+            if not running:  # remaining jobs depend on failed jobs
+                for name in waiting:
+                    results[name] = {'status': 'skipped', 'returncode': None,
+                                     'wall': 0., 'cpu': 0.}
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    returncode, stdout, stderr, wall, cpu = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    returncode, stdout, stderr, wall, cpu = None, '', 'worker process died', 0., 0.
+                status = 'ok' if returncode == 0 else 'failed'
+                results[name] = {'status': status, 'returncode': returncode,
+                                 'wall': wall, 'cpu': cpu}
+                report('==> {name} ({status}, {wall:.2f} s) <=='.format(
+                    name=name, status=status, wall=wall))
+                if stdout:
+                    report(stdout.rstrip('\n'))
+                if stderr:
+                    report(stderr.rstrip('\n'), file=sys.stderr)
+                for after in waiting.values():
+                    if status == 'ok':
+                        after.discard(name)
+            if broken:
+                for name in list(running.values()) + list(waiting):
+                    results[name] = {'status': 'failed', 'returncode': None,
+                                     'wall': 0., 'cpu': 0.}
+                    report('==> {0} (failed, worker process died) <=='.format(name),
+                           file=sys.stderr)
+                break
+    return results
+
+
+def print_table(results):
+    """Print the timing table of the job `results`"""
+    width = max([len(name) for name in results] + [3])
+    template = '{name:{width}}  {status:7}  {wall:>8}  {cpu:>8}'
+    print(template.format(name='job', width=width, status='status', wall='wall/s', cpu='cpu/s'))
+    print('-' * (width + 31))
+    for name, result in sorted(results.items(), key=lambda item: -item[1]['wall']):
+        print(template.format(name=name, width=width, status=result['status'],
+                              wall='{0:.2f}'.format(result['wall']),
+                              cpu='{0:.2f}'.format(result['cpu'])))
+
+
+def main(args):
+    try:
+        jobs = read_jobs(args.jobfile)
+    except (JobError, IOError, ValueError) as exc:
+        print('Invalid job file: ' + str(exc), file=sys.stderr)
+        sys.exit(1)
+    parser = load_parser()
+    errors = {name: resolve(parser, argv) for name, (argv, _) in jobs.items()}
+    errors = {name: error for name, error in errors.items() if error}
+    if errors:
+        for name, error in sorted(errors.items()):
+            print('job {0}: {1}'.format(name, error), file=sys.stderr)
+        sys.exit(1)
+    results = run_jobs(jobs, max_workers=args.jobs)
+    print_table(results)
+    if any(result['status'] != 'ok' for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
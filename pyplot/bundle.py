@@ -0,0 +1,171 @@
+"""Zip archives of the script directories, imported by `zipimport`
+
+On network file systems every imported module costs several `stat` and
+`open` calls, for the directory listing, the source and its bytecode.
+`configure bundle` packs the compiled bytecode of all modules of a script
+directory, including the `__init__.py` files, into one archive below
+`~/.cache/pyplot/bundles`. The `finder` imports the modules of a directory
+from its archive, which is opened once, as long as the recorded size and
+modification time of a module still match its source; changed, new or
+removed modules are imported from the directory itself. Rebuild the bundle
+after larger changes, `configure bundle --remove` deletes the archives.
+
+Only the code is read from the archive, `__file__` and `__path__` of the
+modules still name their sources. The archives are specific to the Python
+version, like the files in `__pycache__`.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import zipfile
+import zipimport
+
+from . import bytecode
+from . import common
+from . import walker
+
+INDEX_FILE = '.pyplot-bundle.json'
+
+
+def bundle_file(directory, bundle_dir=common.BUNDLE_DIR):
+    """Return the archive of the script `directory` for this Python version"""
+    directory = os.path.abspath(directory)
+    digest = hashlib.sha1(directory.encode()).hexdigest()[:10]
+    return os.path.join(bundle_dir, '{0}-{1}.{2}.zip'.format(
+        os.path.basename(directory), digest, sys.implementation.cache_tag))
+
+
+def build(directory, filename):
+    """Write the archive `filename` of the script `directory`
+
+    Only the bytecode is stored, compiled with the path of the source so
+    tracebacks show it. Return the number of modules and the number of them
+    which couldn't be compiled; those are stored as source."""
+    base = os.path.dirname(os.path.abspath(directory))
+    index = {}
+    failed = 0
+    dirname = os.path.dirname(filename)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(temporary, 'w', zipfile.ZIP_STORED) as archive:
+            for dirpath, _, filenames in walker.Walker().walk(os.path.abspath(directory)):
+                relative = os.path.relpath(dirpath, base).replace(os.sep, '/')
+                for name in sorted(filenames):
+                    if not name.endswith('.py'):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    stat = os.stat(path)
+                    with open(path, 'rb') as file_:
+                        source = file_.read()
+                    arcname = relative + '/' + name
+                    index[arcname] = [stat.st_mtime_ns, stat.st_size]
+                    try:
+                        code = compile(source, path, 'exec', dont_inherit=True)
+                    except (SyntaxError, ValueError):
+                        failed += 1
+                        archive.writestr(arcname, source)  # raises when imported
+                        continue
+                    archive.writestr(arcname + 'c', bytecode.pyc_data(
+                        source, code, bytecode.UNCHECKED_FLAGS))
+            archive.writestr(INDEX_FILE, json.dumps(index))
+        os.replace(temporary, filename)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return len(index), failed
+
+
+class BundleLoader(importlib.machinery.SourceFileLoader):
+    """Loader of the source `path` which reads the code from `importer`"""
+
+    def __init__(self, fullname, path, importer):
+        super(BundleLoader, self).__init__(fullname, path)
+        self.importer = importer
+
+    def get_code(self, fullname):
+        try:
+            return self.importer.get_code(fullname)
+        except zipimport.ZipImportError:  # e.g. a damaged archive
+            return super(BundleLoader, self).get_code(fullname)
+
+
+class Bundle(object):
+    """Archive of the script `directory`, importing only unchanged modules"""
+
+    def __init__(self, directory, filename):
+        self.directory = directory
+        self.filename = filename
+        self.base = os.path.dirname(directory)
+        self.importers = {}
+        self.index = json.loads(self.importer(()).get_data(
+            os.path.join(filename, INDEX_FILE)).decode())
+        self.packages = set()
+        for arcname in self.index:
+            parts = arcname.split('/')[:-1]
+            self.packages.update('/'.join(parts[:length]) for length in range(1, len(parts) + 1))
+
+    @classmethod
+    def open(cls, directory, bundle_dir=common.BUNDLE_DIR):
+        """Return the bundle of `directory`, `None` if there is no usable one"""
+        try:
+            return cls(directory, bundle_file(directory, bundle_dir))
+        except (IOError, OSError, ValueError, zipimport.ZipImportError):
+            return None
+
+    def importer(self, package):
+        """Return the zip importer of the package path `package`"""
+        try:
+            return self.importers[package]
+        except KeyError:
+            pass
+        importer = zipimport.zipimporter(os.path.join(self.filename, *package))
+        self.importers[package] = importer
+        return importer
+
+    def is_current(self, arcname):
+        """Return true if the source `arcname` didn't change since bundling"""
+        try:
+            stat = os.stat(os.path.join(self.base, *arcname.split('/')))
+        except OSError:
+            return False
+        return self.index[arcname] == [stat.st_mtime_ns, stat.st_size]
+
+    def find_spec(self, fullname):
+        """Return the spec of `fullname` from the archive, `None` if it is missing or stale
+
+        Like `finder.ScriptFinder.locate`, packages take precedence over
+        modules and modules over namespace packages."""
+        parts = fullname.split('.')
+        relative = '/'.join(parts)
+        location = os.path.join(self.base, *parts)
+        if relative + '/__init__.py' in self.index:
+            arcname, is_package = relative + '/__init__.py', True
+        elif relative + '.py' in self.index:
+            arcname, is_package = relative + '.py', False
+        elif relative in self.packages:
+            spec = importlib.machinery.ModuleSpec(fullname, None, is_package=True)
+            spec.submodule_search_locations = [location]
+            return spec
+        else:
+            return None
+        if not self.is_current(arcname):
+            return None
+        path = os.path.join(self.base, *arcname.split('/'))
+        loader = BundleLoader(fullname, path, self.importer(tuple(parts[:-1])))
+        return importlib.util.spec_from_file_location(
+            fullname, path, loader=loader,
+            submodule_search_locations=[location] if is_package else None)
+
+    def invalidate_caches(self):
+        """Read the directory of the archive again"""
+        self.importer(()).invalidate_caches()
+        self.importers.clear()
@@ -0,0 +1,103 @@
+"""Bytecode of the scripts in a central, per-user cache
+
+Script directories are often read-only or on slow network file systems, so
+the `__pycache__` next to the scripts can't be used. The bytecode is written
+below a prefix directory instead, with the layout of `sys.pycache_prefix`,
+but only for the modules imported by `finder` so the standard library keeps
+using its own caches. The files are hash-based `.pyc` files (PEP 552): they
+are valid as long as the hash of the source matches, independent of the
+modification times.
+"""
+from __future__ import absolute_import
+
+import importlib.machinery
+import importlib.util
+import marshal
+import os
+import sys
+import tempfile
+
+FLAGS = (0b11).to_bytes(4, 'little')  # hash-based and checked
+UNCHECKED_FLAGS = (0b01).to_bytes(4, 'little')  # hash-based, source not checked
+
+
+def cache_from_source(path, prefix):
+    """Return the bytecode file of the source `path` below `prefix`"""
+    head, tail = os.path.split(os.path.abspath(path))
+    return os.path.join(prefix, head.lstrip(os.sep), '{0}.{1}.pyc'.format(
+        tail.rpartition('.')[0], sys.implementation.cache_tag))
+
+
+def read(cached, source):
+    """Return the code object in `cached` if it belongs to `source`, else `None`"""
+    try:
+        with open(cached, 'rb') as file_:
+            data = file_.read()
+    except (IOError, OSError):
+        return None
+    if (data[:4] != importlib.util.MAGIC_NUMBER or data[4:8] != FLAGS
+            or data[8:16] != importlib.util.source_hash(source)):
+        return None
+    try:
+        return marshal.loads(data[16:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def pyc_data(source, code, flags=FLAGS):
+    """Return the content of the hash-based `.pyc` file of `code`"""
+    return (importlib.util.MAGIC_NUMBER + flags + importlib.util.source_hash(source)
+            + marshal.dumps(code))
+
+
+def write(cached, source, code):
+    """Write `code` compiled from `source` to `cached`, ignoring failures"""
+    data = pyc_data(source, code)
+    try:
+        dirname = os.path.dirname(cached)
+        os.makedirs(dirname, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file_:
+            file_.write(data)
+        os.replace(temporary, cached)
+    except (IOError, OSError):
+        pass
+
+
+def compile_file(path, prefix):
+    """Compile `path` into the cache below `prefix` unless it is current
+
+    Return 'current' or 'compiled', or the error message if the source
+    can't be compiled."""
+    try:
+        with open(path, 'rb') as file_:
+            source = file_.read()
+    except (IOError, OSError) as exc:
+        return str(exc)
+    cached = cache_from_source(path, prefix)
+    if read(cached, source) is not None:
+        return 'current'
+    try:
+        code = compile(source, path, 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError) as exc:
+        return '{0}: {1}'.format(type(exc).__name__, exc)
+    write(cached, source, code)
+    return 'compiled'
+
+
+class CachingLoader(importlib.machinery.SourceFileLoader):
+    """Source loader which keeps the bytecode below `prefix`"""
+
+    def __init__(self, fullname, path, prefix):
+        super(CachingLoader, self).__init__(fullname, path)
+        self.prefix = prefix
+
+    def get_code(self, fullname):
+        source = self.get_data(self.path)
+        cached = cache_from_source(self.path, self.prefix)
+        code = read(cached, source)
+        if code is None:
+            code = self.source_to_code(source, self.path)
+            if not sys.dont_write_bytecode:
+                write(cached, source, code)
+        return code
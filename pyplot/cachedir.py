@@ -0,0 +1,139 @@
+"""Size-bounded directory of cache entries with least recently used eviction
+
+Every entry is a sub directory named by its key, containing the cached files
+and a `meta.json` with their total size. The modification time of the meta
+file marks the last use. Entries are written into a temporary directory and
+renamed, so readers never see partial entries.
+"""
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+META_FILE = 'meta.json'
+STATS_FILE = 'stats.json'
+
+
+def directory_size(dirname):
+    """Return the total size of the files below `dirname`"""
+    size = 0
+    for dirpath, _, filenames in os.walk(dirname):
+        size += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+    return size
+
+
+class CacheDirectory(object):
+    """Directory of cache entries, at most `max_size` bytes large"""
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+    def lookup(self, key):
+        """Return the meta data of `key` and mark it as used, `None` if missing"""
+        meta_file = os.path.join(self.directory, key, META_FILE)
+        try:
+            with open(meta_file, 'r') as file_:
+                meta = json.load(file_)
+            os.utime(meta_file)
+        except (IOError, OSError, ValueError):
+            return None
+        return meta
+
+    def path(self, key, *names):
+        """Return the path of the file `names` of the entry `key`"""
+        return os.path.join(self.directory, key, *names)
+
+    def new_entry(self):
+        """Return a temporary directory to be filled and passed to `commit`"""
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        return tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+
+    def commit(self, temporary, key, meta):
+        """Store the filled `temporary` directory as entry `key` with `meta`"""
+        meta = dict(meta, size=directory_size(temporary), time=time.time())
+        with open(os.path.join(temporary, META_FILE), 'w') as file_:
+            json.dump(meta, file_)
+        target = os.path.join(self.directory, key)
+        stale = None
+        if os.path.isdir(target):  # renaming onto a non-empty directory fails
+            stale = tempfile.mkdtemp(dir=self.directory, prefix='.old-')
+            try:
+                os.rename(target, os.path.join(stale, key))
+            except OSError:  # replaced concurrently
+                pass
+        try:
+            os.rename(temporary, target)
+        except OSError:  # stored concurrently
+            shutil.rmtree(temporary, ignore_errors=True)
+        if stale is not None:
+            shutil.rmtree(stale, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """Return `(last_use, size, key)` of all entries"""
+        entries = []
+        try:
+            keys = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for key in keys:
+            if key.startswith('.'):  # entries being written or replaced
+                continue
+            meta_file = os.path.join(self.directory, key, META_FILE)
+            try:
+                with open(meta_file, 'r') as file_:
+                    size = json.load(file_)['size']
+                entries.append((os.stat(meta_file).st_mtime, size, key))
+            except (IOError, OSError, ValueError, KeyError):
+                continue
+        return entries
+
+    def meta(self, key):
+        """Return the meta data of `key` without marking it as used"""
+        try:
+            with open(os.path.join(self.directory, key, META_FILE), 'r') as file_:
+                return json.load(file_)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def evict(self, max_size=None):
+        """Remove the least recently used entries exceeding the maximal size
+
+        Return the number of removed entries."""
+        max_size = self.max_size if max_size is None else max_size
+        total = removed = 0
+        for _, size, key in sorted(self.entries(), reverse=True):
+            total += size
+            if total > max_size:
+                shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Remove all entries and statistics"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def count(self, hit):
+        """Add a hit or miss to the statistics"""
+        stats = self.stats()
+        stats['hits' if hit else 'misses'] += 1
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, STATS_FILE), 'w') as file_:
+                json.dump(stats, file_)
+        except (IOError, OSError):
+            pass
+
+    def stats(self):
+        """Return the number of hits and misses"""
+        try:
+            with open(os.path.join(self.directory, STATS_FILE), 'r') as file_:
+                return json.load(file_)
+        except (IOError, OSError, ValueError):
+            return {'hits': 0, 'misses': 0}
@@ -0,0 +1,59 @@
+"""Thin client running scripts in a warm `pyplot serve` process
+
+Only the standard library and `common` are imported, if no server is
+listening the command is executed by `pyplot` itself.
+"""
+from __future__ import print_function, absolute_import
+
+import os
+import signal
+import socket
+import sys
+
+from . import common
+from .server import recv_message, send_message
+
+FORWARDED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT)
+
+
+def run_remote(argv, address=common.SERVER_SOCKET):
+    """Run `argv` on the server, return the exit code
+
+    `None` is returned if no server is listening on `address`.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except (IOError, OSError):
+        sock.close()
+        return None
+    with sock:
+        request = {'argv': list(argv), 'cwd': os.getcwd(), 'env': dict(os.environ)}
+        send_message(sock, request, fds=(0, 1, 2))
+        pid = recv_message(sock)[0]['pid']
+
+        def forward(signum, _):
+            try:
+                os.killpg(pid, signum)
+            except OSError:
+                pass
+        for signum in FORWARDED_SIGNALS:
+            signal.signal(signum, forward)
+        status = recv_message(sock)[0]
+    if 'signal' in status:
+        signal.signal(status['signal'], signal.SIG_DFL)
+        os.kill(os.getpid(), status['signal'])
+        return 128 + status['signal']
+    return status['returncode']
+
+
+def main():
+    returncode = run_remote(sys.argv[1:])
+    if returncode is None:
+        from .pyplot import ifmain_wrapper
+        returncode = ifmain_wrapper()
+    raise SystemExit(returncode)
+
+
+if __name__ == '__main__':
+    main()
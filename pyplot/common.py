@@ -6,6 +6,7 @@ try:
 except ImportError:
     # import ConfigParser as configparser
     raise ImportError
+import os
 from os.path import expanduser
 
 
@@ -53,3 +54,42 @@ except IOError:
 else:
     ROOT_DIRECTORIES = CONFIG.getlist('include', 'root_directories')
     SUB_DIRECTORIES = CONFIG.getlist('include', 'sub_directories')
+
+
+def get_optional_list(section, option):
+    """Return the list *option* of *section*, empty if it isn't configured"""
+    try:
+        return CONFIG.getlist(section, option)
+    except (configparser.NoOptionError, configparser.NoSectionError):
+        return []
+
+
+EXCLUDE = get_optional_list('include', 'exclude')
+INIT_FILES = CONFIG.getboolean('include', 'init_files', fallback=True)
+PRELOAD = get_optional_list('server', 'preload')
+TELEMETRY = os.environ.get('PYPLOT_TELEMETRY',
+                           str(CONFIG.getboolean('telemetry', 'enabled', fallback=False)))
+TELEMETRY = TELEMETRY.lower() in ('1', 'true', 'yes', 'on')
+TELEMETRY_MAX_SIZE = CONFIG.getint('telemetry', 'max_size', fallback=4096) * 1024
+RESULT_CACHE = CONFIG.getboolean('cache', 'enabled', fallback=False)
+RESULT_CACHE_MAX_SIZE = CONFIG.getint('cache', 'max_size', fallback=1024) * 1024**2
+RESULT_CACHE_DEPTH = CONFIG.getint('cache', 'output_depth', fallback=2)
+DATA_CACHE_MAX_SIZE = CONFIG.getint('data', 'max_size', fallback=4096) * 1024**2
+OUTPUT_WORKERS = CONFIG.getint('output', 'workers', fallback=min(4, os.cpu_count() or 1))
+OUTPUT_QUEUE = CONFIG.getint('output', 'queue', fallback=2 * OUTPUT_WORKERS)
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', expanduser('~/.cache')),
+                         'pyplot')
+MANIFEST_FILE = os.path.join(CACHE_DIR, 'manifest.json')
+STATCACHE_FILE = os.path.join(CACHE_DIR, 'statcache.json')
+COMPLETION_INDEX = os.path.join(CACHE_DIR, 'completion.json')
+JOURNAL_FILE = os.path.join(CACHE_DIR, 'generated.json')
+SERVER_SOCKET = os.path.join(os.environ.get('XDG_RUNTIME_DIR', CACHE_DIR), 'pyplot.sock')
+TELEMETRY_FILE = os.path.join(CACHE_DIR, 'telemetry.jsonl')
+REGISTRY_FILE = os.path.join(CACHE_DIR, 'registry.sqlite')
+PROFILE_DIR = os.path.join(CACHE_DIR, 'profiles')
+BUNDLE_DIR = os.path.join(CACHE_DIR, 'bundles')
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, 'results')
+DATA_CACHE_DIR = os.path.join(CACHE_DIR, 'data')
+PYCACHE_PREFIX = CONFIG.get('include', 'pycache_prefix',
+                            fallback=os.path.join(CACHE_DIR, 'pycache'))
@@ -0,0 +1,97 @@
+"""Fast tab-completion from a precomputed index
+
+`configure update` converts the complete parser tree into a compact index of
+commands, options and choices. Completion requests of *argcomplete* are
+answered from this index without building any parser or importing scripts.
+If the index doesn't exist, the usual *argcomplete* completion is used.
+"""
+from __future__ import print_function, absolute_import
+
+import argparse
+import json
+import os
+import shlex
+import sys
+
+from . import common
+
+
+def build_index(parser):
+    """Return the completion index node of `parser` and its sub-parsers"""
+    node = {'commands': {}, 'options': {}, 'choices': []}
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            for name, subparser in action.choices.items():
+                node['commands'][name] = build_index(subparser)
+        elif action.option_strings:
+            if action.help == argparse.SUPPRESS:
+                continue
+            choices = [str(choice) for choice in action.choices or ()]
+            for option in action.option_strings:
+                node['options'][option] = [action.nargs != 0, choices]
+        elif action.choices:
+            node['choices'].extend(str(choice) for choice in action.choices)
+    return node
+
+
+def write_index(parser, filename=common.COMPLETION_INDEX):
+    """Write the completion index of `parser` to `filename`"""
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(filename, 'w') as file_:
+        json.dump(build_index(parser), file_, separators=(',', ':'))
+
+
+def split_line(line):
+    """Return the completed words and the prefix of the current word"""
+    try:
+        words = shlex.split(line)
+    except ValueError:  # unclosed quotation
+        words = shlex.split(line + '"') if line.count('"') % 2 else line.split()
+    if not line or line[-1].isspace():
+        return words, ''
+    return words[:-1], words[-1]
+
+
+def get_completions(index, words, prefix):
+    """Return the completions of `prefix` after the `words` (without program)"""
+    node = index
+    expects_value = None
+    for word in words:
+        if expects_value is not None:
+            expects_value = None
+        elif word in node['commands']:
+            node = node['commands'][word]
+        elif word.split('=', 1)[0] in node['options']:
+            takes_value, choices = node['options'][word.split('=', 1)[0]]
+            if takes_value and '=' not in word:
+                expects_value = choices
+    if expects_value is not None:
+        candidates = expects_value
+    elif prefix.startswith('-'):
+        candidates = sorted(node['options'])
+    else:
+        candidates = sorted(node['commands']) + node['choices']
+    return [candidate for candidate in candidates if candidate.startswith(prefix)]
+
+
+def complete(filename=common.COMPLETION_INDEX):
+    """Answer an *argcomplete* request, return false if it isn't possible"""
+    if '_ARGCOMPLETE' not in os.environ:
+        return False
+    try:
+        with open(filename, 'r') as file_:
+            index = json.load(file_)
+    except (IOError, OSError, ValueError):
+        return False
+    comp_line = os.environ['COMP_LINE'][:int(os.environ['COMP_POINT'])]
+    words, prefix = split_line(comp_line)
+    start = int(os.environ['_ARGCOMPLETE'])
+    completions = get_completions(index, words[start:], prefix)
+    ifs = os.environ.get('_ARGCOMPLETE_IFS', '\013')
+    filename = os.environ.get('_ARGCOMPLETE_STDOUT_FILENAME')
+    output = open(filename, 'w') if filename else os.fdopen(8, 'w')
+    with output:
+        output.write(ifs.join(completions))
+    return True
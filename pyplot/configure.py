@@ -7,12 +7,29 @@
 from __future__ import print_function, absolute_import, division
 
 import argparse
+import ast
+import hashlib
+import importlib
+import json
 import os.path
+import subprocess
 import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from string import Formatter
 from functools import partial
 
+from . import bundle
+from . import bytecode
 from . import common
+from . import complete
+from . import manifest
+from . import registry
+from . import statcache
+from . import walker
+from . import watcher
 
 
 def get_parser(add_help=True):
@@ -22,7 +39,18 @@ def get_parser(add_help=True):
     subparsers = parser.add_subparsers()
     update_parser = subparsers.add_parser(
         'update', help='Updates the list of scripts in plotter',)
+    update_parser.add_argument('-f', '--full', action='store_true',
+                               help='ignore the stat cache and rescan everything')
     update_parser.set_defaults(execute=Updater.update)
+    watch_parser = subparsers.add_parser(
+        'watch', help='Keep the scripts updated while they are edited')
+    watch_parser.add_argument('--delay', type=float, default=0.5,
+                              help='seconds without changes before updating')
+    watch_parser.add_argument('--poll', action='store_true',
+                              help='poll instead of using inotify')
+    watch_parser.add_argument('--interval', type=float, default=1.,
+                              help='polling interval in seconds')
+    watch_parser.set_defaults(execute=Updater.watch)
     clean_parser = subparsers.add_parser(
         'clean', help='Removes all `__init__` files created by update')
     clean_parser.add_argument('-d', '--dryrun', action='store_true',
@@ -36,6 +64,25 @@ def get_parser(add_help=True):
         'addsub', help='Add new sub_dir')
     add_sub_parser.add_argument('directory')
     add_sub_parser.set_defaults(execute=add_directory)
+    audit_parser = subparsers.add_parser(
+        'audit', help='Measure the import cost of every script')
+    audit_parser.add_argument('--budget', type=float,
+                              help='fail if a script takes more seconds to import')
+    audit_parser.add_argument('--rss-budget', type=float,
+                              help='fail if importing a script needs more MiB')
+    audit_parser.add_argument('--top', type=int, default=3,
+                              help='number of heaviest imports to show per script')
+    audit_parser.set_defaults(execute=Auditor.audit)
+    compile_parser = subparsers.add_parser(
+        'compile', help='Compile all scripts into the bytecode cache')
+    compile_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                                help='number of worker processes')
+    compile_parser.set_defaults(execute=Updater.compile)
+    bundle_parser = subparsers.add_parser(
+        'bundle', help='Pack every script directory into a zip archive for fast imports')
+    bundle_parser.add_argument('-r', '--remove', action='store_true',
+                               help='remove the archives, import from the directories again')
+    bundle_parser.set_defaults(execute=Updater.bundle)
     remove_parser = subparsers.add_parser(
         'rmdir', help='Removes directories form root and sub_dir list')
     remove_parser.set_defaults(execute=Remover.remove_directory)
@@ -95,18 +142,24 @@ class Updater(object):
         """
         from os.path import isfile, join
         absolute_file = join(dirname, filename)
-        def has_main():
-            """Return true if file has a top-level main method"""
-            with open(absolute_file, 'r') as file_:
-                for line in file_.readlines():
-                    if line.startswith('def main('):
-                        return True
-                return False
-        valid = (isfile(absolute_file) and
-                 '.py' in filename and not filename.startswith('.')
-                 and has_main())
+        valid = (isfile(absolute_file) and cls.is_candidate(filename)
+                 and cls.has_main(absolute_file))
         return valid
 
+    @staticmethod
+    def is_candidate(filename):
+        """Return true if the name `filename` can belong to a script"""
+        return '.py' in filename and not filename.startswith('.')
+
+    @staticmethod
+    def has_main(absolute_file):
+        """Return true if file has a top-level main method"""
+        with open(absolute_file, 'r') as file_:
+            for line in file_.readlines():
+                if line.startswith('def main('):
+                    return True
+            return False
+
     @classmethod
     def get_modules(cls, dirname):
         """Return all valid scripts in `dirname`"""
@@ -117,50 +170,378 @@ class Updater(object):
         return module_names
 
     @classmethod
-    def update_dir(cls, dirname, level=0):
+    def cached_modules(cls, dirname, filenames, cache):
+        """Return the valid scripts in `dirname` and if they are unchanged
+
+        Only files whose stat changed according to the `statcache.StatCache`
+        *cache* are read.
+        """
+        scripts = []
+        unchanged = True
+        for filename in filenames:
+            if filename == '__init__.py' or not cls.is_candidate(filename):
+                continue
+            valid, same = cache.is_valid(os.path.join(dirname, filename), cls.has_main)
+            unchanged = unchanged and same
+            if valid:
+                scripts.append(filename.split('.py')[0])
+        return set(scripts), unchanged
+
+    @classmethod
+    def update_dir(cls, dirname, level=0, modules=None, journal=None):
         """update the available plotting scripts"""
+        unique = cls.get_modules(dirname) if modules is None else modules
+        if common.INIT_FILES:
+            cls.write_init(dirname, unique, journal)
+        cls.print_modules(unique, level)
+        return unique
+
+    @classmethod
+    def render_init(cls, modules):
+        """Return the content of an `__init__` file listing `modules`"""
+        return cls.tformatter.format(cls.template, lines=sorted(modules))
+
+    @classmethod
+    def is_generated(cls, content):
+        """Return true if `content` was rendered from the template
+
+        The modules are compared in the order of the file, older versions
+        wrote them unsorted."""
+        try:
+            modules = ast.literal_eval(content.partition('=')[-1].strip())
+        except (SyntaxError, ValueError):
+            return False
+        return (isinstance(modules, list)
+                and content == cls.tformatter.format(cls.template, lines=modules))
+
+    @classmethod
+    def write_init(cls, dirname, modules, journal=None):
+        """write the `__init__` file of `dirname` listing `modules`
+
+        The file is only replaced if its content changes, this is done
+        atomically. The file is recorded in the `journal` of generated files.
+        Return true if the file was written."""
+        init_content = cls.render_init(modules)
+        filename = os.path.join(dirname, '__init__.py')
+        try:
+            with open(filename, 'r') as init_file:
+                changed = init_file.read() != init_content
+                mode = os.fstat(init_file.fileno()).st_mode & 0o7777
+        except (IOError, OSError):
+            changed = True
+            mode = None
+        if changed:
+            if mode is None:  # new file, mode of `open`; reading the umask resets it
+                umask = os.umask(0o022)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            fd, temporary = tempfile.mkstemp(dir=dirname, prefix='.__init__.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as init_file:
+                    init_file.write(init_content)
+                os.chmod(temporary, mode)
+                os.replace(temporary, filename)
+            except BaseException:
+                os.remove(temporary)
+                raise
+        if journal is not None:
+            journal.record(filename, init_content)
+        return changed
+
+    @staticmethod
+    def print_modules(modules, level=0):
+        """print the `modules` of a directory at depth `level`"""
         indent = '│   '*level + '├──'  # if level else ''
-        unique = cls.get_modules(dirname)
-        init_content = cls.tformatter.format(cls.template, lines=unique)
-        with open(os.path.join(dirname, '__init__.py'), 'w') as init_file:
-            init_file.write(init_content)
-        for name in unique:
+        for name in modules:
             print(indent + str(name))
 
+    @classmethod
+    def describe_dir(cls, dirname, script_dir, modules):
+        """Return the manifest entries for `modules` in `dirname`
+
+        The scripts are inspected statically, only if their parser can't be
+        resolved this way they are imported. Scripts which can't be imported
+        are stored as unresolved entries, they will be imported by `pyplot`
+        at runtime. Modules imported by earlier calls are imported again."""
+        namespace = manifest.namespace_of(dirname, script_dir)
+        importlib.invalidate_caches()  # `__init__` files were just written
+        entries = []
+        forgotten = False
+        for name in sorted(modules):
+            filename = os.path.join(dirname, name + '.py')
+            try:
+                entry = manifest.describe_file(filename, name, namespace, script_dir)
+                if entry is None:
+                    if not forgotten:
+                        manifest.forget_scripts(script_dir)
+                        forgotten = True
+                    module = manifest.import_script(script_dir, namespace + '.' + name)
+                    entry = manifest.describe_module(module, name, namespace, script_dir)
+            except Exception as exc:
+                print('Could not inspect ' + name + ': ' + str(exc), file=sys.stderr)
+                entry = manifest.unresolved_entry(name, namespace, script_dir, filename)
+            entries.append(entry)
+        return entries
+
     @classmethod
     def update(cls, args):
-        """Iteratively updates all all available scripts for the subdirectories"""
+        """Iteratively updates all all available scripts for the subdirectories
+
+        Directories and scripts which didn't change since the last update are
+        taken from the stat cache and the manifest, unless `args.full` is set.
+        """
         print('Updating')
         print('Available scripts:')
         print('-' * 50)
-        for script_dir in cls.script_directories:
+        full = getattr(args, 'full', False)
+        cache = statcache.StatCache() if full else statcache.StatCache.load()
+        previous = manifest.Manifest() if full else manifest.Manifest.load()
+        previous_entries = defaultdict(list)
+        for entry in previous.entries:
+            previous_entries[entry['root'], entry['namespace']].append(entry)
+        script_manifest = manifest.Manifest()
+        journal = Journal.load()
+        reused_dirs = 0
+        walks = walker.Walker(listdir=cache.listdir).walk_all(sorted(cls.script_directories))
+        for script_dir in sorted(cls.script_directories):
             print('├──<' + str(os.path.basename(script_dir)) +
                   '>    ' + str(script_dir))
-            for dirpath, dirnames, _ in os.walk(script_dir, topdown=True):
-                for directory in [_dir for _dir in dirnames if _dir.startswith('.')]:
-                    dirnames.remove(directory)
+            for dirpath, _, filenames in walks[script_dir]:
+                same_dir = dirpath in cache.unchanged_dirs
                 level = dirpath.replace(script_dir, '').count(os.sep) + 1
-                cls.update_dir(dirpath, level)
+                unique, same_files = cls.cached_modules(dirpath, filenames, cache)
+                entries = previous_entries[script_dir, manifest.namespace_of(dirpath, script_dir)]
+                has_init = '__init__.py' in filenames or not common.INIT_FILES
+                if (same_dir and same_files and has_init
+                        and set(entry['name'] for entry in entries) == unique):
+                    reused_dirs += 1
+                    cls.print_modules(unique, level)
+                    script_manifest.entries.extend(entries)
+                    continue
+                cls.update_dir(dirpath, level, unique, journal)
+                script_manifest.entries.extend(cls.describe_dir(dirpath, script_dir, unique))
+                cache.record_dir(dirpath)
+        script_manifest.save()
+        cache.save()
+        journal.save()
+        cls.write_completion_index(script_manifest)
+        cls.write_registry(script_manifest)
+        print('-' * 50)
+        print('Reused {reused} unchanged files and {dirs} directories, rescanned {rescanned} files'
+              .format(reused=cache.reused, dirs=reused_dirs, rescanned=cache.rescanned))
 
     @classmethod
-    def clean(cls, args):
-        """remove all the `__init__` files in the subdirectories."""
-        def _remove(pattern, dirname, fnames, dryrun=True):
-            full_fnames = (os.path.join(dirname, fname) for fname in fnames
-                           if pattern in fname)
+    def script_dir_of(cls, dirname):
+        """Return the script directory containing `dirname` or `None`"""
+        for script_dir in sorted(cls.script_directories, key=len, reverse=True):
+            if dirname == script_dir or dirname.startswith(script_dir + os.sep):
+                return script_dir
+        return None
+
+    @classmethod
+    def refresh(cls, dirnames):
+        """Update only the directories `dirnames` and their manifest entries"""
+        script_manifest = manifest.Manifest.load()
+        journal = Journal.load()
+        for dirname in sorted(dirnames):
+            script_dir = cls.script_dir_of(dirname)
+            if script_dir is None:
+                continue
+            namespace = manifest.namespace_of(dirname, script_dir)
+            script_manifest.entries = [
+                entry for entry in script_manifest.entries
+                if entry['root'] != script_dir or entry['namespace'] != namespace
+            ]
+            if not os.path.isdir(dirname):
+                continue
+            unique = cls.get_modules(dirname)
+            if common.INIT_FILES:
+                cls.write_init(dirname, unique, journal)
+            script_manifest.entries.extend(cls.describe_dir(dirname, script_dir, unique))
+        script_manifest.save()
+        journal.save()
+        cls.write_completion_index(script_manifest)
+        cls.write_registry(script_manifest)
+
+    @staticmethod
+    def write_completion_index(script_manifest):
+        """write the index used for tab-completion by `complete`"""
+        from . import pyplot  # avoid circular import
+        parser = pyplot.get_parser(common.ROOT_DIRECTORIES, common.SUB_DIRECTORIES,
+                                   script_manifest)
+        complete.write_index(parser)
+
+    @staticmethod
+    def write_registry(script_manifest):
+        """write the database used by `pyplot search` and to resolve scripts"""
+        from . import pyplot  # avoid circular import
+        registry.Registry().write(pyplot.script_paths(
+            common.ROOT_DIRECTORIES, common.SUB_DIRECTORIES, script_manifest))
+
+    @classmethod
+    def watch(cls, args):
+        """Keep the `__init__` files and the manifest up to date"""
+        tops = sorted(cls.script_directories)
+        script_walker = walker.Walker()
+        directories = [dirpath for walk in script_walker.walk_all(tops).values()
+                       for dirpath, _, _ in walk]
+        observer = watcher.get_observer(directories, poll=args.poll, interval=args.interval,
+                                        is_pruned=partial(script_walker.is_pruned, tops))
+        print('Watching {0} directories using {1}'.format(
+            len(directories), type(observer).__name__))
+
+        def refresh(dirnames):
+            start = time.monotonic()
+            cls.refresh(dirnames)
+            print('[{time}] updated {count} directories in {duration:.1f} ms: {dirs}'.format(
+                time=time.strftime('%H:%M:%S'), count=len(dirnames),
+                duration=(time.monotonic() - start) * 1000, dirs=', '.join(sorted(dirnames))
+            ))
+            sys.stdout.flush()
+        try:
+            watcher.watch(observer, refresh, delay=args.delay)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.close()
+
+    @classmethod
+    def compile(cls, args):
+        """compile the python files of all script directories in parallel
+
+        The bytecode is written below `common.PYCACHE_PREFIX`, files whose
+        bytecode matches the hash of their source are skipped."""
+        if not common.PYCACHE_PREFIX:
+            print('Set `pycache_prefix` in the `[include]` section to compile the scripts')
+            return
+        start = time.monotonic()
+        walks = walker.Walker().walk_all(sorted(cls.script_directories))
+        files = [os.path.join(dirpath, filename) for walk in walks.values()
+                 for dirpath, _, filenames in walk for filename in filenames
+                 if filename.endswith('.py')]
+        counts = defaultdict(int)
+        chunksize = max(1, len(files) // (4 * (args.jobs or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = executor.map(partial(bytecode.compile_file, prefix=common.PYCACHE_PREFIX),
+                                   files, chunksize=chunksize)
+            for filename, result in zip(files, results):
+                if result not in ('compiled', 'current'):
+                    print('Could not compile ' + filename + ': ' + result, file=sys.stderr)
+                    result = 'failed'
+                counts[result] += 1
+        print('Compiled {compiled} files, {current} were up to date, {failed} failed '
+              'in {time:.2f} s'.format(compiled=counts['compiled'], current=counts['current'],
+                                       failed=counts['failed'], time=time.monotonic() - start))
+        if counts['failed']:
+            sys.exit(1)
+
+    @classmethod
+    def bundle(cls, args):
+        """pack every script directory with its bytecode into a zip archive
+
+        The archives are imported by `finder` instead of the directories as
+        long as the modules didn't change, see `bundle`."""
+        for script_dir in sorted(cls.script_directories):
+            filename = bundle.bundle_file(script_dir)
+            if args.remove:
+                if os.path.exists(filename):
+                    os.remove(filename)
+                    print('Removed bundle of ' + script_dir)
+                continue
+            start = time.monotonic()
+            modules, failed = bundle.build(script_dir, filename)
+            print('Bundled {modules} modules of {directory} in {time:.2f} s'.format(
+                modules=modules, directory=script_dir, time=time.monotonic() - start))
+            if failed:
+                print('{0} modules could not be compiled and are bundled as source'.format(failed),
+                      file=sys.stderr)
+        importlib.invalidate_caches()
+
+    @classmethod
+    def generated_files(cls, journal):
+        """Return the `__init__` files generated by `update`
+
+        Without journal, e.g. written by an older version, the script
+        directories are searched for files looking generated."""
+        if journal.files is not None:
+            return sorted(journal.files)
+        walks = walker.Walker().walk_all(sorted(cls.script_directories))
+        return [os.path.join(dirpath, '__init__.py') for walk in walks.values()
+                for dirpath, _, fnames in walk if '__init__.py' in fnames]
+
+    @classmethod
+    def remove_generated(cls, journal, dryrun=True):
+        """Remove the `__init__` files of `journal`, return the removed files
+
+        Files which were modified since they were generated are kept."""
+        removed = []
+        for filename in cls.generated_files(journal):
+            try:
+                with open(filename, 'r') as init_file:
+                    content = init_file.read()
+            except (IOError, OSError):
+                continue
+            if not (journal.is_unmodified(filename, content) or
+                    journal.files is None and cls.is_generated(content)):
+                print('Keeping modified ' + filename)
+                continue
             if dryrun:
-                print('In directory ' + dirname)
-                print('The following files will be removed: ')
-                for name in full_fnames:
-                    print('\t'+os.path.basename(name)+'\tfull name:'+name)
-                print('--------------------------------------------------')
+                print('Would remove ' + filename)
             else:
-                for name in full_fnames:
-                    os.remove(name)
-                print(dirname+' cleaned.')
-        for script_dir in cls.script_directories:
-            for dirpath, _, fnames in os.walk(script_dir):
-                _remove('__init__.py', dirpath, fnames, args.dryrun)
+                os.remove(filename)
+            removed.append(filename)
+        return removed
+
+    @classmethod
+    def clean(cls, args):
+        """remove the `__init__` files written by `update`"""
+        removed = cls.remove_generated(Journal.load(), args.dryrun)
+        if not args.dryrun:
+            print('Removed {0} files'.format(len(removed)))
+            for cache_file in (common.MANIFEST_FILE, common.STATCACHE_FILE,
+                               common.COMPLETION_INDEX, common.JOURNAL_FILE,
+                               common.REGISTRY_FILE):
+                if os.path.exists(cache_file):
+                    os.remove(cache_file)
+
+
+class Journal(object):
+    """Record of the files generated by `configure update`
+
+    For every file the hash of its generated content is stored, so `clean`
+    can tell whether it was modified since. `files` is `None` if no journal
+    was written yet."""
+
+    def __init__(self, files=None):
+        self.files = files
+
+    @classmethod
+    def load(cls, filename=common.JOURNAL_FILE):
+        """Read the journal, `files` is `None` if it doesn't exist"""
+        try:
+            with open(filename, 'r') as file_:
+                return cls(json.load(file_))
+        except (IOError, OSError, ValueError):
+            return cls()
+
+    def save(self, filename=common.JOURNAL_FILE):
+        """Write the journal to `filename`"""
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with open(filename, 'w') as file_:
+            json.dump(self.files or {}, file_, indent=0, sort_keys=True)
+
+    def record(self, filename, content):
+        """Record that `content` was generated as `filename`"""
+        if self.files is None:
+            self.files = {}
+        self.files[filename] = hashlib.sha1(content.encode()).hexdigest()
+
+    def is_unmodified(self, filename, content):
+        """Return true if `filename` still has its generated `content`"""
+        return (self.files is not None and
+                self.files.get(filename) == hashlib.sha1(content.encode()).hexdigest())
 
 
 def add_directory(args, root=False):
@@ -190,6 +571,111 @@ def add_directory(args, root=False):
             common.CONFIG.write(config_fp)
 
 
+class Auditor(object):
+    """Measures the import cost of the scripts in isolated processes"""
+    from textwrap import dedent
+
+    MARKER = 'pyplot-audit'
+    measure_code = dedent(
+        """\
+        import sys, time
+        sys.path.insert(0, sys.argv[3])
+        from pyplot import manifest, telemetry
+        sys.stderr.write('{marker}\\n')
+        wall, cpu = time.perf_counter(), time.process_time()
+        manifest.import_script(sys.argv[1], sys.argv[2])
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        rss = telemetry.peak_rss()
+        sys.stderr.write('{marker}\\n')
+        print(wall, cpu, rss)"""
+    ).format(marker=MARKER)
+
+    @staticmethod
+    def heaviest_imports(importtime, exclude, top=3):
+        """Return the `top` imports `(cumulative seconds, module)` of `-X importtime`
+
+        Only imports between the markers are considered, modules in `exclude`
+        and their sub-modules are ignored.
+        """
+        imports = []
+        lines = importtime.split(Auditor.MARKER + '\n')
+        for line in (lines[1] if len(lines) > 1 else '').splitlines():
+            if not line.startswith('import time:'):
+                continue
+            try:
+                _, cumulative, name = line[len('import time:'):].split('|')
+                cumulative = int(cumulative) / 1e6
+            except ValueError:  # header line
+                continue
+            name = name.strip()
+            if any(name == module or name.startswith(module + '.') for module in exclude):
+                continue
+            imports.append((cumulative, name))
+        return sorted(imports, reverse=True)[:top]
+
+    @classmethod
+    def measure(cls, entry, top=3):
+        """Import the script of the manifest `entry` in a new interpreter
+
+        The script is imported like `pyplot` does, by `manifest.import_script`,
+        so no bytecode is written next to it. Return a dictionary with `wall`
+        and `cpu` time in seconds, the peak `rss` in MiB and the `imports` as
+        returned by `heaviest_imports`.
+        """
+        dotted = entry['namespace'] + '.' + entry['name']
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', cls.measure_code,
+             entry['root'], dotted, package_parent],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        if process.returncode:
+            error = process.stderr.strip().splitlines()
+            return {'error': error[-1] if error else 'exit code ' + str(process.returncode)}
+        wall, cpu, rss = process.stdout.split()[-3:]
+        result = {'wall': float(wall), 'cpu': float(cpu), 'rss': float(rss)}
+        packages = [entry['namespace'].split('.')[0]]
+        result['imports'] = cls.heaviest_imports(process.stderr, packages, top)
+        return result
+
+    @classmethod
+    def audit(cls, args):
+        """Print the import cost of all scripts of the manifest, slowest first"""
+        script_manifest = manifest.Manifest.load()
+        if not script_manifest.entries:
+            print('No scripts known, run `configure update` first.', file=sys.stderr)
+            sys.exit(1)
+        results = []
+        for entry in script_manifest.entries:
+            name = '.'.join((entry['namespace'], entry['name']))
+            results.append((name, cls.measure(entry, args.top)))
+        results.sort(key=lambda item: -item[1].get('wall', float('inf')))
+        width = max(len(name) for name, _ in results)
+        template = '{name:{width}}  {wall:>8}  {cpu:>8}  {rss:>8}  {info}'
+        print(template.format(name='script', width=width, wall='wall/ms', cpu='cpu/ms',
+                              rss='rss/MiB', info='heaviest imports [ms]'))
+        print('-' * (width + 60))
+        over_budget = []
+        for name, result in results:
+            if 'error' in result:
+                print(template.format(name=name, width=width, wall='-', cpu='-', rss='-',
+                                      info='error: ' + result['error']))
+                over_budget.append(name)
+                continue
+            print(template.format(
+                name=name, width=width, wall='{0:.1f}'.format(result['wall'] * 1000),
+                cpu='{0:.1f}'.format(result['cpu'] * 1000), rss='{0:.1f}'.format(result['rss']),
+                info=', '.join('{0} {1:.1f}'.format(module, seconds * 1000)
+                               for seconds, module in result['imports'])
+            ))
+            if ((args.budget is not None and result['wall'] > args.budget)
+                    or (args.rss_budget is not None and result['rss'] > args.rss_budget)):
+                over_budget.append(name)
+        if over_budget:
+            print('Over budget or failing: ' + ', '.join(over_budget), file=sys.stderr)
+            sys.exit(1)
+
+
 class Remover(object):
     """Class to bundle functionality to remove directories from config"""
     directories = common.ROOT_DIRECTORIES + common.SUB_DIRECTORIES
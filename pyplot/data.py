@@ -0,0 +1,165 @@
+"""Parse input files once and reuse the arrays in later runs
+
+Scripts load their inputs through a registered parser::
+
+    from pyplot import data
+    spectrum = data.load('measurement.dat', 'text')
+
+The first load parses the file and stores the result as `.npy` files below
+`~/.cache/pyplot/data`, keyed by the path, size and modification time of the
+file and the name and version of the parser. Later loads map these files
+read-only with `numpy.load(mmap_mode='r')` instead of parsing again, so the
+returned arrays are never writable. Results can be a single array or a
+dictionary of arrays. The least recently used entries are evicted once the
+cache exceeds `max_size` MiB (section `[data]`).
+
+The built-in parsers `text`, `csv` and `hdf5` and the cache need numpy (and
+h5py for `hdf5`). Without numpy only registered parsers which don't use it
+work, and their files are parsed on every load, as are results which aren't
+arrays.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+import shutil
+
+from . import cachedir
+from . import common
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PARSERS = {}
+
+
+def parser(name, version=1):
+    """Decorator registering `function(filename)` as parser `name`
+
+    Increase `version` whenever the result of the parser changes, this
+    invalidates the cached results."""
+    def register(function):
+        PARSERS[name] = (function, version)
+        return function
+    return register
+
+
+@parser('text')
+def parse_text(filename):
+    """Whitespace separated columns, see `numpy.loadtxt`"""
+    return np.loadtxt(filename)
+
+
+@parser('csv')
+def parse_csv(filename):
+    """Comma separated columns with a header naming them"""
+    return np.genfromtxt(filename, delimiter=',', names=True, encoding='utf-8')
+
+
+@parser('hdf5')
+def parse_hdf5(filename):
+    """All data sets of a HDF5 file, requires h5py"""
+    import h5py
+    arrays = {}
+
+    def visit(name, item):
+        if isinstance(item, h5py.Dataset):
+            arrays[name] = item[()]
+    with h5py.File(filename, 'r') as file_:
+        file_.visititems(visit)
+    return arrays
+
+
+def _arrays(result):
+    """Return `(kind, names, arrays)` of a storable `result`, else `None`"""
+    if isinstance(result, np.ndarray):
+        return 'array', [], [result]
+    if isinstance(result, dict) and all(isinstance(value, np.ndarray)
+                                        for value in result.values()):
+        names = sorted(result)
+        return 'dict', names, [result[name] for name in names]
+    return None
+
+
+class DataCache(cachedir.CacheDirectory):
+    """Directory of parsed input files stored as `.npy` files"""
+
+    def __init__(self, directory=common.DATA_CACHE_DIR,
+                 max_size=common.DATA_CACHE_MAX_SIZE):
+        super(DataCache, self).__init__(directory, max_size)
+
+    @staticmethod
+    def key(filename, name):
+        """Return the key of `filename` parsed by parser `name`"""
+        stat = os.stat(filename)
+        identity = [os.path.abspath(filename), stat.st_size, stat.st_mtime_ns,
+                    name, PARSERS[name][1]]
+        return hashlib.sha1(json.dumps(identity).encode()).hexdigest()
+
+    def read(self, key, meta):
+        """Return the memory mapped result stored as `key`"""
+        arrays = [np.load(self.path(key, '{0}.npy'.format(index)),
+                          mmap_mode='r', allow_pickle=False)
+                  for index in range(meta['count'])]
+        if meta['kind'] == 'array':
+            return arrays[0]
+        return dict(zip(meta['names'], arrays))
+
+    def store(self, key, filename, name, result):
+        """Store `result` of parsing `filename`, return whether it was stored"""
+        storable = _arrays(result)
+        if storable is None:
+            return False
+        kind, names, arrays = storable
+        temporary = self.new_entry()
+        try:
+            for index, array in enumerate(arrays):
+                np.save(os.path.join(temporary, '{0}.npy'.format(index)), array,
+                        allow_pickle=False)
+        except ValueError:  # object arrays
+            shutil.rmtree(temporary, ignore_errors=True)
+            return False
+        self.commit(temporary, key, {'kind': kind, 'names': names, 'count': len(arrays),
+                                     'source': os.path.abspath(filename), 'parser': name})
+        return True
+
+    def load(self, filename, name='text'):
+        """Return the content of `filename` parsed by parser `name`"""
+        if name not in PARSERS:
+            raise KeyError('unknown parser {0!r}, known are: {1}'.format(
+                name, ', '.join(sorted(PARSERS))))
+        function = PARSERS[name][0]
+        if np is None:
+            return function(filename)
+        key = self.key(filename, name)
+        meta = self.lookup(key)
+        if meta is not None:
+            try:
+                result = self.read(key, meta)
+            except (IOError, OSError, ValueError, KeyError):
+                pass  # evicted or damaged, parse again
+            else:
+                self.count(True)
+                return result
+        result = function(filename)
+        self.count(False)
+        if self.store(key, filename, name, result):
+            try:  # return the same read-only arrays as later loads
+                return self.read(key, self.meta(key))
+            except (IOError, OSError, ValueError, KeyError, TypeError):
+                pass
+        return result
+
+
+_CACHE = None
+
+
+def load(filename, parser_name='text'):
+    """Return the content of `filename` parsed by `parser_name`, see `DataCache`"""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = DataCache()
+    return _CACHE.load(filename, parser_name)
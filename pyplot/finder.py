@@ -0,0 +1,152 @@
+"""Import finder for the script directories
+
+Instead of putting the parent of every script directory on `sys.path`, the
+`ScriptFinder` on `sys.meta_path` maps the name of each script directory on
+the directory itself. Modules below it are resolved from an in-memory listing
+of their package directory, which is read only once, and names which don't
+exist are remembered as well. Thus importing a script doesn't stat any entry
+of `sys.path`. Directories without `__init__.py` are imported as namespace
+packages, so the files written by `configure update` are optional. If a
+`pycache_prefix` is set, the bytecode is kept below it, see `bytecode`.
+Unchanged modules of directories packed by `configure bundle` are imported
+from their archive, see `bundle`.
+"""
+from __future__ import absolute_import
+
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+from . import bundle
+from . import bytecode
+from . import common
+
+
+class ScriptFinder(importlib.abc.MetaPathFinder):
+    """Finder of the modules below the script directories"""
+
+    def __init__(self, pycache_prefix=None, bundle_dir=None):
+        self.pycache_prefix = pycache_prefix
+        self.bundle_dir = bundle_dir
+        self.bundles = {}
+        self.tops = {}
+        self.listings = {}
+        self.missing = set()
+
+    def add(self, directory):
+        """Make the directory importable under its name"""
+        self.tops.setdefault(os.path.basename(directory), directory)
+
+    def listing(self, dirname):
+        """Return `name -> is_dir` of the entries of `dirname`"""
+        try:
+            return self.listings[dirname]
+        except KeyError:
+            pass
+        try:
+            with os.scandir(dirname) as entries:
+                content = {entry.name: entry.is_dir() for entry in entries}
+        except OSError:
+            content = {}
+        self.listings[dirname] = content
+        return content
+
+    def locate(self, fullname):
+        """Return `(path, is_package)` of the module `fullname` or `None`
+
+        Like for `sys.path` entries, a package with `__init__.py` takes
+        precedence over a module, which takes precedence over a namespace
+        package."""
+        top, _, rest = fullname.partition('.')
+        dirname = self.tops[top]
+        if not rest:
+            return dirname, True
+        *packages, name = rest.split('.')
+        for package in packages:
+            if not self.listing(dirname).get(package):
+                return None
+            dirname = os.path.join(dirname, package)
+        content = self.listing(dirname)
+        path = os.path.join(dirname, name)
+        if content.get(name) and '__init__.py' in self.listing(path):
+            return path, True
+        if content.get(name + '.py') is False:
+            return path + '.py', False
+        if content.get(name):
+            return path, True
+        return None
+
+    def bundle(self, top):
+        """Return the `bundle.Bundle` of the directory `top`, `None` if there is none"""
+        if self.bundle_dir is None:
+            return None
+        try:
+            return self.bundles[top]
+        except KeyError:
+            pass
+        self.bundles[top] = bundle.Bundle.open(self.tops[top], self.bundle_dir)
+        return self.bundles[top]
+
+    def find_spec(self, fullname, path=None, target=None):
+        top = fullname.partition('.')[0]
+        if top not in self.tops or fullname in self.missing:
+            return None
+        script_bundle = self.bundle(top)
+        if script_bundle is not None:
+            spec = script_bundle.find_spec(fullname)
+            if spec is not None:
+                return spec
+        location = self.locate(fullname)
+        if location is None:
+            self.missing.add(fullname)
+            return None
+        filename, is_package = location
+        if not is_package:
+            return self.file_spec(fullname, filename)
+        if '__init__.py' in self.listing(filename):
+            return self.file_spec(fullname, os.path.join(filename, '__init__.py'),
+                                  submodule_search_locations=[filename])
+        spec = importlib.machinery.ModuleSpec(fullname, None, is_package=True)
+        spec.submodule_search_locations = [filename]
+        return spec
+
+    def file_spec(self, fullname, filename, **kwargs):
+        """Return the spec of the source file `filename`"""
+        if self.pycache_prefix is None:
+            return importlib.util.spec_from_file_location(fullname, filename, **kwargs)
+        loader = bytecode.CachingLoader(fullname, filename, self.pycache_prefix)
+        spec = importlib.util.spec_from_file_location(fullname, filename, loader=loader,
+                                                      **kwargs)
+        spec.cached = bytecode.cache_from_source(filename, self.pycache_prefix)
+        return spec
+
+    def invalidate_caches(self):
+        self.listings.clear()
+        self.missing.clear()
+        for script_bundle in self.bundles.values():
+            if script_bundle is not None:
+                script_bundle.invalidate_caches()
+        self.bundles.clear()
+
+
+FINDER = ScriptFinder(common.PYCACHE_PREFIX or None, common.BUNDLE_DIR)
+
+
+def install(directories):
+    """Make the script `directories` importable by the `FINDER`
+
+    The finder is placed before the path based finder, so script directories
+    shadow modules on `sys.path` like they did when prepended to it.
+    """
+    for directory in directories:
+        FINDER.add(directory)
+    if FINDER not in sys.meta_path:
+        for index, finder in enumerate(sys.meta_path):
+            if finder is importlib.machinery.PathFinder:
+                sys.meta_path.insert(index, FINDER)
+                break
+        else:
+            sys.meta_path.append(FINDER)
+    return FINDER
@@ -0,0 +1,146 @@
+"""Static extraction of script metadata
+
+The sources of the scripts are parsed with `ast` instead of importing them,
+thus no user code is executed. The argument parser can be extracted if
+`get_parser` is a plain sequence of `add_argument` calls with literal
+arguments; otherwise the script has to be imported.
+"""
+from __future__ import print_function, absolute_import
+
+import argparse
+import ast
+
+BUILTIN_TYPES = {'int': int, 'float': float, 'str': str, 'complex': complex}
+PARSER_KEYWORDS = {'prog', 'usage', 'description', 'epilog', 'add_help'}
+SCRIPT_FUNCTIONS = ('get_parser', 'main')
+
+
+class NotStatic(Exception):
+    """Raised if a construct can't be evaluated without executing it"""
+
+
+def _literal(node):
+    """Evaluate the literal `node`, builtin types are allowed as well"""
+    if isinstance(node, ast.Name) and node.id in BUILTIN_TYPES:
+        return BUILTIN_TYPES[node.id]
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise NotStatic(ast.dump(node))
+
+
+def _is_call(node, name):
+    """Return true if `node` calls a function or method called `name`"""
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr == name
+    return isinstance(func, ast.Name) and func.id == name
+
+
+def _is_docstring(node):
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) \
+        and isinstance(node.value.value, str)
+
+
+def _bound_names(node):
+    """Return the names bound by the module level statement `node`
+
+    Function and class bodies are not entered, `*` stands for a star import."""
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return {'*' if alias.name == '*' else alias.asname or alias.name.partition('.')[0]
+                for alias in node.names}
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {node.name}
+    if isinstance(node, ast.Name):
+        return {node.id} if isinstance(node.ctx, ast.Store) else set()
+    if isinstance(node, ast.Lambda):
+        return set()
+    names = set()
+    for child in ast.iter_child_nodes(node):
+        names |= _bound_names(child)
+    return names
+
+
+def static_parser(function):
+    """Rebuild the parser returned by the `get_parser` definition `function`
+
+    Only functions of the form::
+
+        def get_parser(add_help=True):
+            parser = argparse.ArgumentParser(..., add_help=add_help)
+            parser.add_argument(...)
+            return parser
+
+    are supported, `NotStatic` is raised for everything else.
+    """
+    body = [node for node in function.body if not _is_docstring(node)]
+    if len(body) < 2:
+        raise NotStatic('get_parser is too short')
+    first, last = body[0], body[-1]
+    if not (isinstance(first, ast.Assign) and len(first.targets) == 1
+            and isinstance(first.targets[0], ast.Name)
+            and _is_call(first.value, 'ArgumentParser')):
+        raise NotStatic('get_parser has to start with `parser = ArgumentParser(...)`')
+    name = first.targets[0].id
+    if first.value.args or any(keyword.arg not in PARSER_KEYWORDS
+                               for keyword in first.value.keywords):
+        raise NotStatic('unsupported arguments of ArgumentParser')
+    if not (isinstance(last, ast.Return) and isinstance(last.value, ast.Name)
+            and last.value.id == name):
+        raise NotStatic('get_parser has to end with `return parser`')
+    parser = argparse.ArgumentParser(add_help=False)
+    for node in body[1:-1]:
+        call = getattr(node, 'value', None)
+        if not (isinstance(node, ast.Expr) and _is_call(call, 'add_argument')
+                and isinstance(call.func, ast.Attribute)
+                and isinstance(call.func.value, ast.Name)
+                and call.func.value.id == name):
+            raise NotStatic('only `parser.add_argument` calls are supported')
+        if any(keyword.arg is None for keyword in call.keywords):
+            raise NotStatic('`**kwargs` are not supported')
+        args = [_literal(arg) for arg in call.args]
+        kwargs = {keyword.arg: _literal(keyword.value) for keyword in call.keywords}
+        parser.add_argument(*args, **kwargs)
+    return parser
+
+
+def inspect_source(source, filename='<script>'):
+    """Return the metadata of the script `source`
+
+    The returned dictionary contains the docstring `doc`, the number of
+    positional parameters of `get_parser` and `main` (`None` if they aren't
+    defined) and `parser`, the statically resolved parent parser or `None`.
+    `dynamic` is the set of these functions which are bound otherwise, e.g.
+    imported, assigned or defined conditionally; they can't be inspected.
+    """
+    tree = ast.parse(source, filename)
+    info = {'doc': ast.get_docstring(tree, clean=False),
+            'get_parser': None, 'main': None, 'parser': None, 'dynamic': set()}
+    functions = {}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            functions[node.name] = node
+            info['dynamic'].discard(node.name)
+            continue
+        names = _bound_names(node)
+        for name in SCRIPT_FUNCTIONS:
+            if name in names or '*' in names:
+                functions.pop(name, None)
+                info['dynamic'].add(name)
+    for name in SCRIPT_FUNCTIONS:
+        if name in functions:
+            info[name] = len(functions[name].args.args)
+    if 'get_parser' in functions:
+        try:
+            info['parser'] = static_parser(functions['get_parser'])
+        except (NotStatic, argparse.ArgumentError, TypeError, ValueError):
+            info['parser'] = None
+    return info
+
+
+def inspect_file(filename):
+    """Return the metadata of the script `filename`, see `inspect_source`"""
+    with open(filename, 'rb') as file_:
+        return inspect_source(file_.read(), filename)
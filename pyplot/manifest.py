@@ -0,0 +1,267 @@
+"""On-disk manifest of the registered scripts
+
+The manifest is written by `configure update` and contains for every script
+its name, namespace, help line, description and a serialized version of its
+argument parser. It allows `pyplot` to build the parser tree without importing
+the scripts; they are only imported once they are actually run. Whenever
+possible the entries are created by `inspection` without importing as well.
+"""
+from __future__ import print_function, absolute_import
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+
+from . import common
+from . import finder
+from . import inspection
+
+VERSION = 1
+BUILTIN_TYPES = inspection.BUILTIN_TYPES
+
+
+class NotSerializable(Exception):
+    """Raised if an argument parser can't be represented in the manifest"""
+
+
+def file_hash(filename):
+    """Return the sha1 hex digest of the content of `filename`"""
+    with open(filename, 'rb') as file_:
+        return hashlib.sha1(file_.read()).hexdigest()
+
+
+def namespace_of(dirname, root_dir):
+    """Return the dotted namespace of `dirname` inside of `root_dir`"""
+    relative = os.path.relpath(dirname, os.path.dirname(root_dir))
+    return relative.replace(os.sep, '.')
+
+
+def import_script(root_dir, dotted):
+    """Import the module `dotted` which lives below `root_dir`"""
+    finder.install([root_dir])
+    return importlib.import_module(dotted)
+
+
+def forget_scripts(root_dir):
+    """Remove the modules imported from below `root_dir` from `sys.modules`
+
+    Long running processes like `configure watch` import the current sources
+    again afterwards, instead of getting the modules imported before."""
+    prefix = os.path.join(os.path.abspath(root_dir), '')
+    for name, module in list(sys.modules.items()):
+        paths = [getattr(module, '__file__', None)] + list(getattr(module, '__path__', None) or ())
+        if any(path and os.path.join(os.path.abspath(path), '').startswith(prefix)
+               for path in paths):
+            del sys.modules[name]
+
+
+def _check_json(value):
+    """Raise `NotSerializable` if `value` can't be stored as JSON"""
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        raise NotSerializable(repr(value))
+    return value
+
+
+def serialize_parser(parser):
+    """Return a JSON compatible list describing the actions of `parser`"""
+    if parser._mutually_exclusive_groups:
+        raise NotSerializable('mutually exclusive groups are not supported')
+    action_names = {}
+    for name, action_class in parser._registries['action'].items():
+        if name is not None:  # `None` is an alias of 'store'
+            action_names.setdefault(action_class, name)
+    arguments = []
+    for action in parser._actions:
+        if isinstance(action, argparse._HelpAction):
+            continue
+        try:
+            action_name = action_names[type(action)]
+        except KeyError:
+            raise NotSerializable(type(action).__name__)
+        if action_name == 'parsers':
+            raise NotSerializable('nested sub-parsers are not supported')
+        type_name = getattr(action.type, '__name__', action.type)
+        if type_name is not None and type_name not in BUILTIN_TYPES:
+            raise NotSerializable('type ' + str(type_name))
+        choices = action.choices
+        if choices is not None:
+            choices = list(choices)
+        arguments.append({
+            'action': action_name,
+            'option_strings': list(action.option_strings),
+            'dest': action.dest,
+            'nargs': action.nargs,
+            'const': _check_json(action.const),
+            'default': _check_json(action.default),
+            'type': type_name,
+            'choices': _check_json(choices),
+            'required': action.required,
+            'help': action.help,
+            'metavar': _check_json(action.metavar),
+            'version': getattr(action, 'version', None),
+        })
+    return arguments
+
+
+def add_arguments(parser, arguments):
+    """Add the serialized `arguments` to `parser`"""
+    for spec in arguments:
+        action_class = parser._registry_get('action', spec['action'])
+        accepted = inspect.signature(action_class.__init__).parameters
+        kwargs = {key: value for key, value in spec.items()
+                  if key in accepted and key not in ('option_strings', 'dest')}
+        kwargs['action'] = spec['action']
+        if kwargs.get('type') is not None:
+            kwargs['type'] = BUILTIN_TYPES[kwargs['type']]
+        if spec['option_strings']:
+            kwargs['dest'] = spec['dest']
+            parser.add_argument(*spec['option_strings'], **kwargs)
+        else:
+            kwargs.pop('required', None)
+            parser.add_argument(spec['dest'], **kwargs)
+
+
+def _new_entry(name, namespace, root_dir, filename, doc, kind):
+    """Return a manifest entry without arguments"""
+    stat = os.stat(filename)
+    try:
+        help_str = doc.split('\n', 1)[0]
+    except AttributeError:
+        help_str = ''
+    return {
+        'name': name,
+        'namespace': namespace,
+        'root': root_dir,
+        'file': filename,
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'hash': file_hash(filename),
+        'help': help_str,
+        'description': doc,
+        'kind': kind,
+        'arguments': None,
+        'defaults': {},
+    }
+
+
+def describe_file(filename, name, namespace, root_dir):
+    """Return the manifest entry of the script `filename` without importing it
+
+    `None` is returned if the parser can't be resolved statically, the
+    script has to be imported and described by `describe_module` instead.
+    """
+    info = inspection.inspect_file(filename)
+    if 'get_parser' in info['dynamic']:
+        return None
+    if info['get_parser'] is None:
+        return _new_entry(name, namespace, root_dir, filename, info['doc'], 'argv')
+    if info['parser'] is None:
+        return None
+    entry = _new_entry(name, namespace, root_dir, filename, info['doc'], 'argparse')
+    try:
+        entry['arguments'] = serialize_parser(info['parser'])
+    except NotSerializable:
+        return None
+    return entry
+
+
+def describe_module(module, name, namespace, root_dir):
+    """Return the manifest entry of the imported script `module`"""
+    kind = 'argparse' if hasattr(module, 'get_parser') else 'argv'
+    entry = _new_entry(name, namespace, root_dir, module.__file__, module.__doc__, kind)
+    if kind == 'argparse':
+        try:
+            parser = module.get_parser(add_help=False)
+            entry['arguments'] = serialize_parser(parser)
+            entry['defaults'] = _check_json(dict(parser._defaults))
+        except NotSerializable:
+            entry['arguments'] = None
+            entry['defaults'] = {}
+    return entry
+
+
+def unresolved_entry(name, namespace, root_dir, filename):
+    """Return an entry for a script which has to be imported to be used"""
+    return {
+        'name': name,
+        'namespace': namespace,
+        'root': root_dir,
+        'file': filename,
+        'mtime': None,
+        'size': None,
+        'hash': None,
+        'kind': None,
+    }
+
+
+class LazyMain(object):
+    """Callable importing the script of a manifest entry only when called"""
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    def load(self):
+        """Import and return the script module"""
+        dotted = self.entry['namespace'] + '.' + self.entry['name']
+        return import_script(self.entry['root'], dotted)
+
+    def __call__(self, *args):
+        return self.load().main(*args)
+
+
+class Manifest(object):
+    """Collection of script entries, stored as JSON file"""
+
+    def __init__(self, entries=()):
+        self.entries = list(entries)
+
+    @classmethod
+    def load(cls, filename=common.MANIFEST_FILE):
+        """Read the manifest, an empty one is returned if it is unusable"""
+        try:
+            with open(filename, 'r') as file_:
+                content = json.load(file_)
+        except (IOError, OSError, ValueError):
+            return cls()
+        if content.get('version') != VERSION:
+            return cls()
+        return cls(content['scripts'])
+
+    def save(self, filename=common.MANIFEST_FILE):
+        """Write the manifest to `filename`"""
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with open(filename, 'w') as file_:
+            json.dump({'version': VERSION, 'scripts': self.entries}, file_)
+
+    def add(self, entry):
+        """Add a new script `entry`"""
+        self.entries.append(entry)
+
+    def entries_for(self, root_dir):
+        """Return all entries which belong to `root_dir`"""
+        return [entry for entry in self.entries if entry['root'] == root_dir]
+
+    @staticmethod
+    def is_fresh(entry):
+        """Return true if the file of `entry` didn't change since the update
+
+        Modification time and size are compared first, the hash is only
+        computed if they differ.
+        """
+        if entry['kind'] is None:
+            return False
+        try:
+            stat = os.stat(entry['file'])
+        except OSError:
+            return False
+        if stat.st_mtime == entry['mtime'] and stat.st_size == entry['size']:
+            return True
+        return file_hash(entry['file']) == entry['hash']
@@ -0,0 +1,240 @@
+"""Run a script for every file of a stream of input files
+
+The script is named by its commands as for `pyplot` itself, followed by its
+arguments. The inputs are glob patterns given by `--input` or, without patterns or for `-`,
+the lines of standard input::
+
+    $ pyplot map -i 'runs/*/output.h5' sub1 toyplot --dpi 300
+    $ find runs -name '*.h5' | pyplot map --option=--input sub1 toyplot
+
+Every file is appended to the arguments of the script, as positional argument
+or as value of `--option`. The inputs are read lazily and sent in chunks to a
+pool of worker processes, which import the script only once. At most
+`--window` chunks are in flight, so arbitrarily long streams use constant
+memory. Failures are reported per file as they happen.
+"""
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import contextlib
+import glob
+import io
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from . import output
+from . import runner
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('-i', '--input', action='append', default=[],
+                        help='glob pattern of the inputs, `-` or none reads standard input')
+    parser.add_argument('-o', '--option',
+                        help='pass the file as value of this option instead of positional')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='number of worker processes')
+    parser.add_argument('--chunk', type=int, default=4,
+                        help='number of files sent to a worker at once')
+    parser.add_argument('--window', type=int,
+                        help='maximal number of chunks in flight, default twice the jobs')
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help='script and its arguments, e.g. `sub1 toyplot -s 3`')
+    return parser
+
+
+def iter_inputs(patterns, stdin=None):
+    """Yield the files matching `patterns`, or the lines of `stdin` for `-`"""
+    for pattern in patterns or ['-']:
+        if pattern == '-':
+            for line in stdin if stdin is not None else sys.stdin:
+                line = line.rstrip('\n')
+                if line:
+                    yield line
+        elif glob.has_magic(pattern):
+            for filename in glob.iglob(pattern, recursive=True):
+                yield filename
+        else:
+            yield pattern
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items of `iterable`"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, max(1, size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_chunk(name, arguments, option, filenames):
+    """Run the script `name` for every file, return `(filename, error, output, wall)`
+
+    `error` is `None` for successful runs."""
+    results = []
+    for filename in filenames:
+        argv = list(arguments) + ([option, filename] if option else [filename])
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        error = None
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                runner.run(name, argv)
+                if output.flush(report=False):
+                    error = 'exporting figures failed'
+            except SystemExit as exc:
+                if exc.code:
+                    lines = stderr.getvalue().strip().splitlines()
+                    error = lines[-1] if lines else 'exit status {0}'.format(exc.code)
+            except Exception as exc:
+                error = '{0}: {1}'.format(type(exc).__name__, exc)
+        results.append((filename, error, stdout.getvalue(), time.perf_counter() - start))
+    return results
+
+
+class Progress(object):
+    """Counts of processed files, printed to `stream`, default `sys.stderr`"""
+
+    def __init__(self, stream=None):
+        self._stream = stream
+        self.start = time.perf_counter()
+        self.done = 0
+        self.failed = 0
+
+    @property
+    def stream(self):
+        """The stream of the reports, `sys.stderr` is looked up when used"""
+        return sys.stderr if self._stream is None else self._stream
+
+    @property
+    def rate(self):
+        """Processed files per second"""
+        return self.done / max(time.perf_counter() - self.start, 1e-9)
+
+    def update(self, results):
+        """Count and report the `results` of a chunk"""
+        for filename, error, stdout, _ in results:
+            self.done += 1
+            if stdout:
+                print(stdout.rstrip('\n'))
+            if error is not None:
+                self.failed += 1
+                self.clear()
+                print('failed {0}: {1}'.format(filename, error), file=self.stream)
+        if self.stream.isatty():
+            print('\r{0} done, {1} failed, {2:.1f} files/s'.format(
+                self.done, self.failed, self.rate), end='', file=self.stream)
+        self.stream.flush()
+
+    def clear(self):
+        """Remove the progress line of a terminal"""
+        if self.stream.isatty():
+            print('\r\033[K', end='', file=self.stream)
+
+    def summary(self):
+        """Return the final report"""
+        return 'Processed {0} files in {1:.1f} s ({2:.1f} files/s), {3} failed'.format(
+            self.done, time.perf_counter() - self.start, self.rate, self.failed)
+
+
+def map_chunks(executor, function, chunks, window, progress, restart=None):
+    """Submit `function(chunk)` for all `chunks` keeping `window` in flight
+
+    If a worker process dies, the pool is replaced by the executor returned
+    by `restart` and the unfinished chunks are run again one at a time, so
+    only the chunk killing its worker fails. Without `restart` the unfinished
+    chunks fail and the remaining chunks are dropped."""
+    running = {}
+
+    def fail(chunk):
+        progress.update([(item, 'worker process died', '', 0.) for item in chunk])
+
+    def collect(futures):
+        """Report the results of `futures`, return the chunks lost with their worker"""
+        lost = []
+        for future in futures:
+            chunk = running.pop(future)
+            try:
+                results = future.result()
+            except BrokenProcessPool:
+                lost.append(chunk)
+            else:
+                progress.update(results)
+        return lost
+
+    def recover(lost):
+        """Rerun the `lost` chunks in a new pool, return it or `None` without `restart`"""
+        lost += collect(list(running))
+        if restart is None:
+            for chunk in lost:
+                fail(chunk)
+            return None
+        executor = restart()
+        if len(lost) == 1:  # the only chunk running when the worker died
+            fail(lost[0])
+            return executor
+        for chunk in lost:
+            try:
+                progress.update(executor.submit(function, chunk).result())
+            except BrokenProcessPool:
+                fail(chunk)
+                executor = restart()
+        return executor
+
+    for chunk in chunks:
+        lost = []
+        if len(running) >= window:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            lost = collect(done)
+        if not lost:
+            try:
+                running[executor.submit(function, chunk)] = chunk
+                continue
+            except BrokenProcessPool:
+                pass
+        executor = recover(lost)
+        if executor is None:
+            return progress
+        running[executor.submit(function, chunk)] = chunk
+    lost = collect(list(running))
+    if lost:
+        recover(lost)
+    return progress
+
+
+def main(args):
+    script_runner = runner.Runner()
+    try:
+        name, argv = script_runner.split(args.command)
+        script_runner.resolve(name)
+    except runner.UnknownScript as exc:
+        print(str(exc), file=sys.stderr)
+        sys.exit(1)
+    jobs = max(1, args.jobs or 1)
+    function = partial(run_chunk, name, argv, args.option)
+    chunks = chunked(iter_inputs(args.input), args.chunk)
+    with contextlib.ExitStack() as stack:
+        def start():
+            """Return a new pool, shut down when leaving the stack"""
+            return stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+        progress = map_chunks(start(), function, chunks, args.window or 2 * jobs,
+                              Progress(), restart=start)
+    progress.clear()
+    print(progress.summary(), file=sys.stderr)
+    if progress.failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
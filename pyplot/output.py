@@ -0,0 +1,134 @@
+"""Export finished figures in background processes
+
+Encoding figures with `savefig` often takes a large part of the run time of
+a script. Instead, a script can hand a finished figure to `export`::
+
+    from pyplot import output
+    output.export(figure, 'figures/spectrum', formats=('png', 'pdf'), dpi=300)
+
+The figure is pickled at once and rendered in one of `workers` processes (section
+`[output]` of the configuration) while the script continues. At most `queue`
+figures are pending; further calls of `export` wait for a free slot. Scripts
+run by `pyplot` are flushed before it exits, which reports the time of every
+file and the failures. Other programs have to call `flush` themselves.
+"""
+from __future__ import print_function, absolute_import
+
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import common
+
+
+def _init_worker():
+    """Use a non-interactive backend in the workers"""
+    try:
+        import matplotlib
+    except ImportError:
+        return
+    matplotlib.use('Agg', force=True)
+
+
+def render(pickled, basename, formats, kwargs):
+    """Save the `pickled` figure in all `formats`, return `(filename, seconds, error)`"""
+    figure = pickle.loads(pickled)
+    results = []
+    dirname = os.path.dirname(basename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname, exist_ok=True)
+    for format_ in formats:
+        filename = '{0}.{1}'.format(basename, format_)
+        start = time.perf_counter()
+        try:
+            figure.savefig(filename, format=format_, **kwargs)
+        except Exception as exc:
+            results.append((filename, time.perf_counter() - start,
+                            '{0}: {1}'.format(type(exc).__name__, exc)))
+        else:
+            results.append((filename, time.perf_counter() - start, None))
+    return results
+
+
+class ExportQueue(object):
+    """Bounded queue of figures rendered by a pool of worker processes"""
+
+    def __init__(self, workers=common.OUTPUT_WORKERS, max_pending=common.OUTPUT_QUEUE):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.executor = None
+        self.pending = []
+
+    def submit(self, figure, basename, formats=('png',), **kwargs):
+        """Queue `figure` to be saved as `basename.FORMAT` for all `formats`
+
+        Blocks while the queue is full. The figure is pickled right away, so
+        the script may change or close it as soon as this returns."""
+        basename = os.path.abspath(str(basename))  # the script may change directory
+        pickled = pickle.dumps(figure, pickle.HIGHEST_PROTOCOL)
+        self.slots.acquire()
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        try:
+            future = self.executor.submit(render, pickled, basename, tuple(formats), kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        self.pending.append((future, basename, tuple(formats)))
+        return future
+
+    def flush(self):
+        """Wait for all queued figures, return their `(filename, seconds, error)`"""
+        results = []
+        for future, basename, formats in self.pending:
+            try:
+                results.extend(future.result())
+            except Exception as exc:  # e.g. a worker died
+                error = '{0}: {1}'.format(type(exc).__name__, exc)
+                results.extend(('{0}.{1}'.format(basename, format_), 0., error)
+                               for format_ in formats)
+        self.pending = []
+        return results
+
+    def shutdown(self):
+        """Flush the queue and stop the workers"""
+        results = self.flush()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return results
+
+
+_QUEUE = None
+
+
+def export(figure, basename, formats=('png',), **kwargs):
+    """Save `figure` in the background, see `ExportQueue.submit`
+
+    `kwargs` are passed on to `figure.savefig`."""
+    global _QUEUE
+    if _QUEUE is None:
+        _QUEUE = ExportQueue()
+    return _QUEUE.submit(figure, basename, formats, **kwargs)
+
+
+def flush(report=True):
+    """Wait for all exported figures and return the number of failures
+
+    With `report` the time of every file and the failures are printed."""
+    if _QUEUE is None:
+        return 0
+    results = _QUEUE.flush()
+    failures = 0
+    for filename, seconds, error in results:
+        if error is None:
+            if report:
+                print('exported {0} in {1:.3f} s'.format(filename, seconds), file=sys.stderr)
+        else:
+            failures += 1
+            print('failed to export {0}: {1}'.format(filename, error), file=sys.stderr)
+    return failures
@@ -0,0 +1,145 @@
+"""Profile a single run of a script with `pyplot --profile SCRIPT ...`
+
+The import of the script and its `main` are profiled separately by cProfile.
+For each phase a `.pstats` file is written below `~/.cache/pyplot/profiles`,
+readable by `pstats` or e.g. snakeviz, as well as one file of collapsed
+stacks `import;...` and `main;...` for flame graph tools like `flamegraph.pl`
+or speedscope. The wall time of both phases and the functions with the
+largest cumulative time of `main` are printed.
+
+cProfile only records callers and callees, so the stacks are reconstructed
+by splitting the time of every function between its callers in proportion
+to their calls.
+"""
+from __future__ import print_function, absolute_import
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import time
+from collections import defaultdict
+
+from . import common
+
+MIN_FRACTION = 1e-4  # stacks with less of the total time are dropped
+
+
+def label(function):
+    """Return the frame name of the pstats key `function` in a stack"""
+    filename, line, name = function
+    if filename == '~':  # built-in
+        text = name
+    else:
+        text = '{0} ({1}:{2})'.format(name, os.path.basename(filename), line)
+    return text.replace(';', ',')
+
+
+def collapsed_stacks(stats, prefix=()):
+    """Return `stack -> seconds` of the profile `stats`
+
+    The time of each function is split between its callers in proportion to
+    the cumulative time spent in the calls from them. Recursion is cut and
+    stacks below `MIN_FRACTION` of the total time are dropped."""
+    entries = stats.stats
+    callees = defaultdict(list)
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            callees[caller].append(function)
+    threshold = MIN_FRACTION * stats.total_tt
+    stacks = defaultdict(float)
+
+    def visit(function, path, functions, fraction):
+        _, _, own, cumulative, _ = entries[function]
+        if cumulative * fraction < threshold:
+            return
+        path = path + (label(function),)
+        functions = functions | {function}
+        if own * fraction > 0:
+            stacks[';'.join(path)] += own * fraction
+        for callee in callees[function]:
+            if callee in functions:
+                continue
+            total = entries[callee][3]
+            if total > 0:
+                visit(callee, path, functions,
+                      fraction * entries[callee][4][function][3] / total)
+
+    for function, entry in entries.items():
+        if not entry[4]:
+            visit(function, tuple(prefix), frozenset(), 1.)
+    return stacks
+
+
+def file_base(name, directory=common.PROFILE_DIR):
+    """Return the path of the profiles of script `name` without extension"""
+    name = re.sub(r'[^\w.-]', '_', name)
+    return os.path.join(directory, '{0}-{1}'.format(name, time.strftime('%Y%m%d-%H%M%S')))
+
+
+class RunProfile(object):
+    """Profiles of the phases of a run"""
+
+    def __init__(self, name, directory=common.PROFILE_DIR):
+        self.name = name
+        self.base = file_base(name, directory)
+        self.phases = []
+
+    def call(self, phase, function, *args):
+        """Return `function(*args)`, profiled as `phase`"""
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            return function(*args)
+        finally:
+            profiler.disable()
+            self.phases.append((phase, time.perf_counter() - start, profiler))
+
+    def write(self):
+        """Write the pstats and collapsed stack files, return their names"""
+        dirname = os.path.dirname(self.base)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        filenames = []
+        stacks = {}
+        for phase, _, profiler in self.phases:
+            filename = '{0}.{1}.pstats'.format(self.base, phase)
+            profiler.dump_stats(filename)
+            filenames.append(filename)
+            stacks.update(collapsed_stacks(pstats.Stats(profiler), prefix=[phase]))
+        filename = self.base + '.folded'
+        with open(filename, 'w') as file_:
+            for stack, seconds in sorted(stacks.items()):
+                microseconds = int(round(seconds * 1e6))
+                if microseconds:
+                    file_.write('{0} {1}\n'.format(stack, microseconds))
+        filenames.append(filename)
+        return filenames
+
+    def report(self, top=15, stream=None):
+        """Print the time of the phases and the top functions of the last"""
+        stream = sys.stderr if stream is None else stream
+        print('Profile of {0}:'.format(self.name), file=stream)
+        for phase, seconds, _ in self.phases:
+            print('  {0:<7} {1:8.3f} s'.format(phase, seconds), file=stream)
+        if self.phases:
+            stats = pstats.Stats(self.phases[-1][2], stream=stream)
+            stats.sort_stats('cumulative').print_stats(top)
+
+
+def profile(run, args, name, load=None, directory=common.PROFILE_DIR, top=15):
+    """Run `run(args)` profiled, `load` is called first as import phase
+
+    The profiles are written and reported even if the run fails."""
+    run_profile = RunProfile(name, directory)
+    try:
+        if load is not None:
+            run_profile.call('import', load)
+        return run_profile.call('main', run, args)
+    finally:
+        filenames = run_profile.write()
+        run_profile.report(top)
+        for filename in filenames:
+            print('wrote ' + filename, file=sys.stderr)
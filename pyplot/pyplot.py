@@ -7,39 +7,69 @@
 from __future__ import absolute_import, print_function
 
 import argparse
+import importlib
 import os
 import sys
 from collections import defaultdict
+from functools import partial
 
 import argcomplete
 from . import __version__
+from . import batch
 from . import configure
-from .common import ROOT_DIRECTORIES, SUB_DIRECTORIES
+from . import finder
+from . import manifest as manifest_
+from . import mapper
+from . import output
+from . import profiling
+from . import registry
+from . import rerun
+from . import resultcache
+from . import server
+from . import sweep
+from . import telemetry
+from . import walker
+from .common import ROOT_DIRECTORIES, SUB_DIRECTORIES, TELEMETRY, RESULT_CACHE
+
+COMMANDS = (
+    ('configure', configure),
+    ('serve', server),
+    ('batch', batch),
+    ('sweep', sweep),
+    ('map', mapper),
+    ('stats', telemetry),
+    ('cache', resultcache),
+    ('watch', rerun),
+    ('search', registry),
+)
+RESERVED_COMMANDS = ('configure',)  # can't be shadowed by scripts
+GLOBAL_FLAGS = ('--cache', '--no-cache', '--refresh', '--profile')
+NOT_HASHED = ('run', 'main', 'used_subparser', 'result_cache', 'refresh', 'profile')
 
 
 def register_scripts(subparsers, dirname, root_dir):
-    """Registers all scripts in `__all__` if dirname is module"""
-    path_tail = os.path.split(root_dir)[1]
-    dirname = str(dirname[dirname.find(path_tail):])
-    parent_module_str = dirname.replace(os.sep, '.')
+    """Registers all scripts of the package `dirname`
+
+    The scripts listed in `__all__` are registered if the package defines it,
+    else all files with a main function."""
+    parent_module_str = manifest_.namespace_of(dirname, root_dir)
     try:
-        parent_module = __import__(parent_module_str,
-                                   fromlist=parent_module_str)
+        parent_module = importlib.import_module(parent_module_str)
     except ImportError:
         # directories which aren't a module are ignored
         return
     try:
-        parent_module.__all__
+        module_strs = parent_module.__all__
     except AttributeError:
-        return
-    for module_str in parent_module.__all__:
+        module_strs = sorted(configure.Updater.get_modules(dirname))
+    for module_str in module_strs:
         try:
-            module = __import__(parent_module_str + '.' +
-                                module_str, fromlist=module_str)
+            module = importlib.import_module(parent_module_str + '.' + module_str)
         except ImportError as imp_err:
             if 'no module' in str(imp_err).lower():
                 print('Missing module '+module_str+'! Running `configure update` is required!',
                       file=sys.stderr)
+                continue
             else:
                 raise
 
@@ -99,7 +129,13 @@ class SubparserDict(defaultdict):
         self[key] = self['default']
 
     def add_sub(self, key):
-        """Add *key* which refers to a new parser of the root subparser"""
+        """Add *key* which refers to a new parser of the root subparser
+
+        Nested keys added for a root of the same name are dropped, they are
+        created again below the new parser."""
+        for nested in [name for name in self.parser_dict if name.startswith(key + '.')]:
+            del self.parser_dict[nested]
+            self.pop(nested, None)
         self.parser_dict[key] = self['default'].add_parser(
             key,
             help="::access members of {0}".format(key)
@@ -107,34 +143,159 @@ class SubparserDict(defaultdict):
         self[key] = self.__missing__(key)
 
 
-def get_parser(roots, subs):
-    """Return Argument Parser, providing available scripts"""
+def register_entries(subparsers, entries):
+    """Registers the scripts of the manifest `entries`
+
+    Entries whose file changed since the last `configure update` are
+    inspected again, if that isn't possible statically they are imported and
+    registered like scripts without manifest."""
+    for entry in entries:
+        current = entry
+        resolved = entry['kind'] == 'argv' or entry.get('arguments') is not None
+        if not (resolved and manifest_.Manifest.is_fresh(entry)):
+            try:
+                current = manifest_.describe_file(entry['file'], entry['name'],
+                                                  entry['namespace'], entry['root'])
+            except (IOError, OSError, SyntaxError):
+                current = None
+        if current is not None:
+            register_entry(subparsers[entry['namespace']], current)
+            continue
+        dotted = entry['namespace'] + '.' + entry['name']
+        try:
+            module = manifest_.import_script(entry['root'], dotted)
+        except ImportError as imp_err:
+            if 'no module' in str(imp_err).lower():
+                print('Missing module '+entry['name']+'! Running `configure update` is required!',
+                      file=sys.stderr)
+                continue
+            raise
+        register_parser(subparsers[entry['namespace']], entry['name'], module)
+
+
+def get_parser(roots, subs, manifest=None):
+    """Return Argument Parser, providing available scripts
+
+    Directories contained in the `manifest` are registered without importing
+    their scripts, by default the manifest written by `configure update` is
+    used."""
+    if manifest is None:
+        manifest = manifest_.Manifest.load()
     parser = argparse.ArgumentParser()
     subparsers = SubparserDict(parser)
+    finder.install(list(roots) + list(subs))
+    unregistered = [dir for dir in list(roots) + list(subs) if not manifest.entries_for(dir)]
+    walks = walker.Walker().walk_all(unregistered) if unregistered else {}
     for adder, directories in ((subparsers.add_root, roots),
                                (subparsers.add_sub, subs)):
         for dir in directories:
-            module_dir, module_str = os.path.split(dir)
-            adder(module_str)
-            sys.path.insert(0, module_dir)
-            try:
-                __import__(module_str)
-            except ImportError:
-                pass  # module contains no init file, configure add must be run
-            sys.path.remove(module_dir)
-            for dirpath, dirnames, _ in os.walk(dir, topdown=True):
-                for directory in [_dir for _dir in dirnames if _dir.startswith('.')]:
-                    dirnames.remove(directory)
+            adder(os.path.basename(dir))
+            entries = manifest.entries_for(dir)
+            if entries:
+                register_entries(subparsers, entries)
+                continue
+            for dirpath, _, _ in walks[dir]:
                 register_scripts(subparsers, dirpath, dir)
-    register_parser(subparsers['default'], 'configure', configure)
+    register_commands(subparsers['default'])
 
-    parser.add_argument('--version', action='version',
-                        version='%(prog)s '+__version__)
+    add_global_arguments(parser)
 
     argcomplete.autocomplete(parser)
     return parser
 
 
+def register_commands(subparsers):
+    """Add the `COMMANDS` of `pyplot` itself to the top level `subparsers`
+
+    Root scripts and namespaces of the same name shadow the commands, except
+    the `RESERVED_COMMANDS`, which replace them with a warning."""
+    for command, module in COMMANDS:
+        if command in subparsers.choices:
+            if command not in RESERVED_COMMANDS:
+                continue
+            print('The script or namespace `{0}` is hidden by the command of pyplot, '
+                  'rename it.'.format(command), file=sys.stderr)
+            del subparsers.choices[command]
+            subparsers._choices_actions = [action for action in subparsers._choices_actions
+                                           if action.dest != command]
+        register_parser(subparsers, command, module)
+
+
+def add_global_arguments(parser):
+    """Add the options of `pyplot` itself to the top level `parser`"""
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s '+__version__)
+    parser.add_argument('--cache', dest='result_cache', action='store_true', default=None,
+                        help='restore the result of the script if it is cached')
+    parser.add_argument('--no-cache', dest='result_cache', action='store_false',
+                        help='neither use nor store a cached result')
+    parser.add_argument('--refresh', action='store_true',
+                        help='run the script and replace its cached result')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile the import and main of the script')
+
+
+def script_paths(roots, subs, manifest):
+    """Return a dictionary mapping command paths on the scripts they select
+
+    The values are lists of `(is_root, directory, entry)` of the manifest
+    entries reached by the tuple of commands, e.g. `('sub1', 'toyplot')`."""
+    paths = defaultdict(list)
+    for is_root, directories in ((True, roots), (False, subs)):
+        for directory in directories:
+            for entry in manifest.entries_for(directory):
+                namespace = entry['namespace'].split('.')
+                path = (namespace[1:] if is_root else namespace) + [entry['name']]
+                paths[tuple(path)].append((is_root, directory, entry))
+    return paths
+
+
+def dispatch_parser(argv, roots, subs, manifest=None):
+    """Return a parser containing only the script or command selected by `argv`
+
+    The leading arguments are resolved against the registry, or the manifest
+    if it is given or there is no registry, so only the selected script is
+    registered. `None` is returned if this isn't possible:
+    for help and options of `pyplot` itself, namespaces without script,
+    ambiguous paths or directories missing in the manifest. Then the complete
+    parser of `get_parser` has to be used."""
+    tokens = list(argv)
+    while tokens and tokens[0] in GLOBAL_FLAGS:
+        tokens.pop(0)
+    if not tokens or tokens[0].startswith('-') or '_ARGCOMPLETE' in os.environ:
+        return None
+    parser = argparse.ArgumentParser()
+    subparsers = SubparserDict(parser)
+    commands = dict(COMMANDS)
+    if tokens[0] in RESERVED_COMMANDS:
+        register_parser(subparsers['default'], tokens[0], commands[tokens[0]])
+    else:
+        paths = None
+        if manifest is None:
+            paths = registry.Registry().lookup(tokens, roots, subs)
+        if paths is None:
+            if manifest is None:
+                manifest = manifest_.Manifest.load()
+            if not all(manifest.entries_for(dir) for dir in list(roots) + list(subs)):
+                return None
+            paths = script_paths(roots, subs, manifest)
+        matches = [paths[tuple(tokens[:length])] for length in range(len(tokens), 0, -1)
+                   if tuple(tokens[:length]) in paths]
+        if not matches and tokens[0] in commands:  # not shadowed by a script
+            register_parser(subparsers['default'], tokens[0], commands[tokens[0]])
+            add_global_arguments(parser)
+            return parser
+        if not matches or len(matches) > 1 or len(matches[0]) > 1:
+            return None
+        is_root, directory, entry = matches[0][0]
+        finder.install(list(roots) + list(subs))
+        adder = subparsers.add_root if is_root else subparsers.add_sub
+        adder(os.path.basename(directory))
+        register_entries(subparsers, [entry])
+    add_global_arguments(parser)
+    return parser
+
+
 def register_parser(subparsers, module_str, module):
     """Add a parser `module_str` to `subparsers`
 
@@ -168,6 +329,34 @@ def register_parser(subparsers, module_str, module):
         module_subparser.set_defaults(run=module.main)
 
 
+def register_entry(subparsers, entry):
+    """Add the parser of the manifest `entry` to `subparsers`
+
+    Like `register_parser`, but the script is only imported when it is run."""
+    if entry['kind'] == 'argv':
+        module_subparser = subparsers.add_parser(
+            entry['name'],
+            description=entry['description'],
+            help=entry['help']
+        )
+        module_subparser.add_argument(
+            'arguments',
+            nargs=argparse.REMAINDER,
+            help='possible unknown arguments for {module}'.format(module=entry['name']),
+        )
+        module_subparser.set_defaults(run=substitute, name=entry['name'],
+                                      main=manifest_.LazyMain(entry))
+    else:
+        module_subparser = subparsers.add_parser(
+            entry['name'],
+            description=entry['description'],
+            help=entry['help']
+        )
+        manifest_.add_arguments(module_subparser, entry['arguments'])
+        module_subparser.set_defaults(**entry['defaults'])
+        module_subparser.set_defaults(run=manifest_.LazyMain(entry))
+
+
 def substitute(args):
     """replace `sys.argv` to launch a script without 'get_parser'"""
     replace_argv = [args.name, ] + args.arguments
@@ -175,14 +364,79 @@ def substitute(args):
     args.main()
 
 
+def main_of(args):
+    """Return the main function of the script run by `args`"""
+    return args.main if args.run is substitute else args.run
+
+
+def script_name(args):
+    """Return the dotted name of the script run by `args`"""
+    script_main = main_of(args)
+    if isinstance(script_main, manifest_.LazyMain):
+        return script_main.entry['namespace'] + '.' + script_main.entry['name']
+    return getattr(script_main, '__module__', None) or str(script_main)
+
+
+def script_source(args):
+    """Return the file of the script run by `args` and its import path"""
+    script_main = main_of(args)
+    if isinstance(script_main, manifest_.LazyMain):
+        entry = script_main.entry
+        return entry['file'], [os.path.dirname(entry['root'])]
+    module = sys.modules[script_main.__module__]
+    package = module.__name__.split('.')
+    top = os.path.join(os.path.dirname(module.__file__), *(['..'] * (len(package) - 1)))
+    return module.__file__, [os.path.normpath(top)]
+
+
+def script_arguments(args):
+    """Return the arguments of `args` which determine the result of the script"""
+    if args.run is substitute:
+        return [args.name] + list(args.arguments)
+    return {key: value for key, value in vars(args).items()
+            if key not in NOT_HASHED and not callable(value)}
+
+
+def use_cache(args):
+    """Return true if the result of `args` is looked up in the result cache"""
+    enabled = getattr(args, 'result_cache', None)
+    if enabled is None:
+        enabled = RESULT_CACHE
+    return enabled and all(args.run is not module.main for _, module in COMMANDS)
+
+
 def main(args):
-    args.run(args)
+    run = args.run
+    cached = False
+    if getattr(args, 'profile', False):
+        script_main = main_of(args)
+        run = partial(profiling.profile, args.run, name=script_name(args),
+                      load=getattr(script_main, 'load', None))
+    elif use_cache(args):
+        script_file, search_path = script_source(args)
+        key = resultcache.result_key(script_file, script_arguments(args), search_path)
+        run = partial(resultcache.ResultCache().call, args.run, key=key,
+                      refresh=getattr(args, 'refresh', False),
+                      outputs=resultcache.declared_outputs(script_file),
+                      flush=output.flush)
+        cached = True
+    try:
+        if not TELEMETRY:
+            result = run(args)
+        else:
+            with telemetry.record(script_name(args), sys.argv[1:]):
+                result = run(args)
+    finally:
+        failures = output.flush()
+    if failures or (cached and result):
+        sys.exit(1)
 
 
 def ifmain_wrapper():
     """Function bundling the calls in `ifmain` to reduce redundancy"""
     try:
-        parser = get_parser(ROOT_DIRECTORIES, SUB_DIRECTORIES)
+        parser = (dispatch_parser(sys.argv[1:], ROOT_DIRECTORIES, SUB_DIRECTORIES)
+                  or get_parser(ROOT_DIRECTORIES, SUB_DIRECTORIES))
     except Exception as exc:
         # in case of an error try to directly launch configure script
         if sys.argv[1] == 'configure':
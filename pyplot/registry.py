@@ -0,0 +1,210 @@
+"""Search the registered scripts by name, description and arguments
+
+`configure update` stores every script in a SQLite database: its command
+path, file, hash, modification time, description and arguments. A full-text
+index over these columns answers searches ranked by relevance, e.g.
+`pyplot search spectral function`. Words are matched as prefixes and all of
+them have to occur. `pyplot` also resolves the script to run from the
+database, without reading the complete manifest.
+"""
+from __future__ import print_function, absolute_import
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+
+from . import common
+
+VERSION = 1
+SCHEMA = """
+CREATE TABLE scripts (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    is_root INTEGER NOT NULL,
+    directory TEXT NOT NULL,
+    file TEXT,
+    hash TEXT,
+    mtime REAL,
+    help TEXT,
+    description TEXT,
+    arguments TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX scripts_path ON scripts (path);
+CREATE TABLE directories (directory TEXT NOT NULL, is_root INTEGER NOT NULL);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE search USING fts5(
+    path, help, description, arguments, content='scripts', content_rowid='id'
+);
+"""
+WEIGHTS = (10.0, 5.0, 1.0, 2.0)  # of the columns of `search`
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('query', nargs='+', help='words to search for')
+    parser.add_argument('-n', '--limit', type=int, default=20,
+                        help='maximal number of matches to show')
+    return parser
+
+
+def describe_arguments(arguments):
+    """Return the searchable text of the serialized `arguments` of an entry"""
+    words = []
+    for spec in arguments or ():
+        words.extend(spec['option_strings'] or [spec['dest']])
+        if spec.get('help'):
+            words.append(spec['help'])
+    return ' '.join(words)
+
+
+def match_expression(query):
+    """Return the FTS5 expression matching all words of `query` as prefixes"""
+    words = query.split()
+    return ' '.join('"{0}"*'.format(word.replace('"', '""')) for word in words)
+
+
+class Registry(object):
+    """SQLite database of the registered scripts"""
+
+    def __init__(self, filename=common.REGISTRY_FILE):
+        self.filename = filename
+
+    def connect(self):
+        """Return a read-only connection, `None` if there is no usable database"""
+        try:
+            connection = sqlite3.connect('file:{0}?mode=ro'.format(self.filename), uri=True)
+            version = connection.execute('PRAGMA user_version').fetchone()[0]
+        except sqlite3.Error:
+            return None
+        if version != VERSION:
+            connection.close()
+            return None
+        return connection
+
+    def write(self, paths):
+        """Replace the database by the scripts of `paths`
+
+        `paths` maps command paths on the `(is_root, directory, entry)` of
+        the scripts, see `pyplot.script_paths`. The database is written to a
+        temporary file and renamed, readers never see a partial update."""
+        dirname = os.path.dirname(self.filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=dirname or '.', prefix='.registry-')
+        os.close(fd)
+        try:
+            connection = sqlite3.connect(temporary)
+            with connection:
+                connection.executescript(SCHEMA)
+                try:
+                    connection.executescript(FTS_SCHEMA)
+                except sqlite3.OperationalError:  # built without FTS5
+                    pass
+                rows = []
+                directories = set()
+                for path, matches in sorted(paths.items()):
+                    for is_root, directory, entry in matches:
+                        directories.add((directory, is_root))
+                        rows.append((' '.join(path), is_root, directory, entry['file'],
+                                     entry['hash'], entry['mtime'], entry.get('help'),
+                                     entry.get('description'),
+                                     describe_arguments(entry.get('arguments')),
+                                     json.dumps(entry)))
+                connection.executemany(
+                    'INSERT INTO scripts (path, is_root, directory, file, hash, mtime, help,'
+                    ' description, arguments, entry) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                connection.executemany('INSERT INTO directories VALUES (?, ?)', directories)
+                if self.has_fts(connection):
+                    connection.execute("INSERT INTO search (search) VALUES ('rebuild')")
+                connection.execute('PRAGMA user_version = {0}'.format(VERSION))
+            connection.close()
+            os.replace(temporary, self.filename)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    @staticmethod
+    def has_fts(connection):
+        """Return true if the database contains the full-text index"""
+        return connection.execute("SELECT count(*) FROM sqlite_master "
+                                  "WHERE name = 'search'").fetchone()[0] > 0
+
+    def lookup(self, tokens, roots, subs):
+        """Return the scripts selected by the prefixes of `tokens`
+
+        The result maps the command paths which are prefixes of `tokens` on
+        the `(is_root, directory, entry)` of their scripts, like
+        `pyplot.script_paths`. `None` is returned if the database is missing
+        or doesn't cover all directories in `roots` and `subs`."""
+        connection = self.connect()
+        if connection is None:
+            return None
+        try:
+            configured = set((directory, 1) for directory in roots)
+            configured.update((directory, 0) for directory in subs)
+            known = set(connection.execute('SELECT directory, is_root FROM directories'))
+            if not configured <= known:
+                return None
+            prefixes = [' '.join(tokens[:length]) for length in range(1, len(tokens) + 1)]
+            rows = connection.execute(
+                'SELECT path, is_root, directory, entry FROM scripts WHERE path IN ({0})'
+                .format(', '.join('?' * len(prefixes))), prefixes)
+            paths = {}
+            for path, is_root, directory, entry in rows:
+                if (directory, is_root) in configured:
+                    paths.setdefault(tuple(path.split(' ')), []).append(
+                        (bool(is_root), directory, json.loads(entry)))
+            return paths
+        finally:
+            connection.close()
+
+    def search(self, query, limit=20):
+        """Return `(path, help, file)` of the best matches of `query`
+
+        `None` is returned if there is no database."""
+        connection = self.connect()
+        if connection is None:
+            return None
+        try:
+            if self.has_fts(connection):
+                return connection.execute(
+                    'SELECT scripts.path, scripts.help, scripts.file FROM search'
+                    ' JOIN scripts ON scripts.id = search.rowid WHERE search MATCH ?'
+                    ' ORDER BY bm25(search, {0}) LIMIT ?'.format(', '.join(map(str, WEIGHTS))),
+                    (match_expression(query), limit)).fetchall()
+            words = query.split()
+            condition = ' AND '.join(["(path || ' ' || ifnull(help, '') || ' ' || "
+                                      "ifnull(description, '') || ' ' || arguments) LIKE ?"]
+                                     * len(words))
+            return connection.execute(
+                'SELECT path, help, file FROM scripts WHERE {0} ORDER BY path LIMIT ?'
+                .format(condition or '1'),
+                ['%{0}%'.format(word) for word in words] + [limit]).fetchall()
+        finally:
+            connection.close()
+
+
+def main(args):
+    matches = Registry().search(' '.join(args.query), args.limit)
+    if matches is None:
+        print('No registry found, run `pyplot configure update` first.')
+        return
+    if not matches:
+        print('No script matches `{0}`'.format(' '.join(args.query)))
+        return
+    width = max(len(path) for path, _, _ in matches)
+    for path, help_str, filename in matches:
+        print('{0:<{width}}  {1}'.format(path, help_str or '', width=width))
+        print('{0:<{width}}  {1}'.format('', filename, width=width))
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
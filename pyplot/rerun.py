@@ -0,0 +1,142 @@
+"""Run a script again whenever its sources or inputs change
+
+The script is run once and stays imported. Afterwards its file, the local
+modules it imports and its input files are watched: arguments naming existing
+files, the files of `PYPLOT_INPUTS` and those given by `--input`. After a
+change the changed modules and the script are reloaded and `main` is called
+again in the same process, so heavy imports like `matplotlib` are kept.
+"""
+from __future__ import print_function, absolute_import
+
+import argparse
+import importlib
+import os
+import sys
+import time
+import traceback
+
+from . import output
+from . import resultcache
+from . import watcher
+from .statcache import stat_key
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('-i', '--input', action='append', default=[],
+                        help='additional input file or glob pattern to watch')
+    parser.add_argument('--delay', type=float, default=0.2,
+                        help='seconds without changes before running again')
+    parser.add_argument('--poll', action='store_true',
+                        help='poll instead of using inotify')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='polling interval in seconds')
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help='script and its arguments, e.g. `sub1 toyplot -s 3`')
+    return parser
+
+
+def watched_files(entry, argv, patterns=()):
+    """Return the modules and the input files running `entry` with `argv` uses"""
+    script_file = os.path.abspath(entry['file'])
+    search_path = [os.path.dirname(entry['root'])]
+    patterns = list(patterns) + resultcache.declared_inputs(script_file)
+    inputs = resultcache.find_inputs(argv, patterns)
+    modules = {script_file} | resultcache.local_modules(script_file, search_path)
+    return modules, set(os.path.abspath(filename) for filename in inputs)
+
+
+def stats(files):
+    """Return `filename -> stat key` of the existing `files`"""
+    result = {}
+    for filename in files:
+        try:
+            result[filename] = stat_key(os.stat(filename))
+        except OSError:
+            result[filename] = None
+    return result
+
+
+def reload_modules(filenames):
+    """Reload the imported modules of the files `filenames`"""
+    for module in list(sys.modules.values()):
+        if os.path.abspath(getattr(module, '__file__', None) or '') in filenames:
+            importlib.reload(module)
+
+
+def run_once(script_runner, name, argv, reload, iteration, changed=()):
+    """Run the script, print its time and return false if it failed"""
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    ok = True
+    try:
+        script_runner.run(name, argv, reload=reload)
+    except SystemExit as exc:
+        ok = exc.code in (None, 0)
+    except Exception:
+        traceback.print_exc()
+        ok = False
+    ok = not output.flush() and ok
+    print('[{time}] run {iteration} {status} in {wall:.3f} s (cpu {cpu:.3f} s){changed}'.format(
+        time=time.strftime('%H:%M:%S'), iteration=iteration, status='finished' if ok else 'failed',
+        wall=time.perf_counter() - start_wall, cpu=time.process_time() - start_cpu,
+        changed=', changed: ' + ' '.join(sorted(os.path.basename(path) for path in changed))
+        if changed else ''))
+    sys.stdout.flush()
+    return ok
+
+
+def main(args):
+    from . import runner  # avoid circular import
+    script_runner = runner.Runner()
+    try:
+        name, argv = script_runner.split(args.command)
+        entry, _ = script_runner.resolve(name)
+    except runner.UnknownScript as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
+    modules, inputs = watched_files(entry, argv, args.input)
+    files = modules | inputs
+    previous = stats(files)
+    run_once(script_runner, name, argv, False, 1)
+    directories = set(os.path.dirname(filename) for filename in files)
+    observer = watcher.get_observer(sorted(directories), poll=args.poll,
+                                    interval=args.interval)
+    print('Watching {0} files, press Ctrl-C to stop'.format(len(files)))
+    iteration = [1]
+
+    def rerun(_):
+        current = stats(files)
+        changed = set(filename for filename in files if current[filename] != previous[filename])
+        previous.update(current)
+        if not changed:
+            return
+        iteration[0] += 1
+        try:
+            reload_modules((changed & modules) - {os.path.abspath(entry['file'])})
+        except Exception:
+            traceback.print_exc()
+            print('[{0}] run {1} skipped'.format(time.strftime('%H:%M:%S'), iteration[0]))
+            return
+        run_once(script_runner, name, argv, bool(changed & modules), iteration[0], changed)
+        new_modules, new_inputs = watched_files(entry, argv, args.input)
+        modules.update(new_modules)
+        for filename in (new_modules | new_inputs) - files:
+            files.add(filename)
+            previous[filename] = stats([filename])[filename]
+            if os.path.dirname(filename) not in directories:
+                directories.add(os.path.dirname(filename))
+                observer.add(os.path.dirname(filename))
+    try:
+        watcher.watch(observer, rerun, delay=args.delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.close()
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
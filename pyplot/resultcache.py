@@ -0,0 +1,325 @@
+"""Show and prune the caches of script results and input data
+
+If the cache is enabled, by `enabled = yes` in the `[cache]` section of the
+configuration file or for a single run by `pyplot --cache`, every run of a
+script is keyed by the hashes of its source and of the local modules it
+imports, its parsed arguments and the content of its input files. Inputs are
+all arguments naming an existing file and the files matching the glob
+patterns of the module attribute `PYPLOT_INPUTS`.
+
+The files created or changed during the run are stored under this key. These
+are the files matching the glob patterns of `PYPLOT_OUTPUTS`, relative to the
+working directory, or without them the files at most `output_depth` (default
+2) directories below the working directory. Running the script again with the
+same key restores them instead of running it. The least recently used results
+are evicted once the cache exceeds `max_size` MiB.
+
+The cache of input data parsed by `pyplot.data` is shown and pruned along.
+"""
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import ast
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from . import cachedir
+from . import common
+from . import manifest
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('--clear', action='store_true',
+                        help='remove all entries')
+    parser.add_argument('--prune', type=float, metavar='MIB',
+                        help='evict the least recently used entries above MIB MiB')
+    parser.add_argument('--list', action='store_true',
+                        help='list the entries, most recently used first')
+    parser.add_argument('--only', choices=('results', 'data'),
+                        help='only show or change this cache')
+    return parser
+
+
+def _module_file(base, dotted):
+    """Return the file of module `dotted` inside `base`, `None` if missing"""
+    path = os.path.join(base, *dotted.split('.')) if dotted else base
+    for candidate in (path + '.py', os.path.join(path, '__init__.py')):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _imported_names(tree, dirname):
+    """Yield `(bases, dotted)` of the modules possibly imported in `tree`
+
+    `bases` is `None` for absolute imports, else the package directory of the
+    relative import inside of `dirname`.
+    """
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield None, alias.name
+        elif isinstance(node, ast.ImportFrom):
+            base = None
+            if node.level:
+                base = dirname
+                for _ in range(node.level - 1):
+                    base = os.path.dirname(base)
+            module = node.module or ''
+            yield base, module
+            for alias in node.names:
+                yield base, (module + '.' + alias.name).lstrip('.')
+
+
+def local_modules(filename, search_path):
+    """Return the files of the local modules imported by `filename`
+
+    Only modules found in the directory of `filename` or in `search_path` are
+    considered, their imports are followed recursively.
+    """
+    found = set()
+    pending = [os.path.abspath(filename)]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(current, 'r') as file_:
+                tree = ast.parse(file_.read(), current)
+        except (IOError, OSError, SyntaxError, ValueError):
+            continue
+        dirname = os.path.dirname(current)
+        for base, dotted in _imported_names(tree, dirname):
+            bases = [base] if base is not None else [dirname] + list(search_path)
+            for directory in bases:
+                module_file = _module_file(directory, dotted)
+                if module_file is not None:
+                    module_file = os.path.abspath(module_file)
+                    if module_file not in found:
+                        found.add(module_file)
+                        pending.append(module_file)
+                    break
+    found.discard(os.path.abspath(filename))
+    return found
+
+
+def declared_patterns(filename, name):
+    """Return the glob patterns assigned to the module attribute `name` in `filename`"""
+    try:
+        with open(filename, 'r') as file_:
+            tree = ast.parse(file_.read(), filename)
+    except (IOError, OSError, SyntaxError, ValueError):
+        return []
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id == name):
+            try:
+                patterns = ast.literal_eval(node.value)
+            except ValueError:
+                return []
+            return [patterns] if isinstance(patterns, str) else list(patterns)
+    return []
+
+
+def declared_inputs(filename):
+    """Return the glob patterns of `PYPLOT_INPUTS` in `filename`"""
+    return declared_patterns(filename, 'PYPLOT_INPUTS')
+
+
+def declared_outputs(filename):
+    """Return the glob patterns of `PYPLOT_OUTPUTS` in `filename`"""
+    return declared_patterns(filename, 'PYPLOT_OUTPUTS')
+
+
+def find_inputs(arguments, patterns=()):
+    """Return the existing files named in `arguments` or matched by `patterns`"""
+    values = arguments.values() if isinstance(arguments, dict) else arguments
+    inputs = set()
+    for value in values:
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            if isinstance(item, str) and os.path.isfile(item):
+                inputs.add(item)
+    for pattern in patterns:
+        inputs.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(inputs)
+
+
+def result_key(script_file, arguments, search_path=()):
+    """Return the key of running `script_file` with `arguments`
+
+    `arguments` is the JSON representable dictionary of the parsed arguments
+    or the list of arguments of scripts without `get_parser`.
+    """
+    digest = hashlib.sha256()
+    for filename in [script_file] + sorted(local_modules(script_file, search_path)):
+        digest.update('{0}\0{1}\0'.format(filename, manifest.file_hash(filename)).encode())
+    digest.update(json.dumps(arguments, sort_keys=True, default=repr).encode())
+    for filename in find_inputs(arguments, declared_inputs(script_file)):
+        digest.update('\0{0}\0{1}'.format(filename, manifest.file_hash(filename)).encode())
+    return digest.hexdigest()
+
+
+def _shallow_files(directory, depth=common.RESULT_CACHE_DEPTH):
+    """Yield the files at most `depth` directories below `directory`
+
+    Hidden directories are skipped."""
+    pending = [(directory, 0)]
+    while pending:
+        dirname, level = pending.pop()
+        try:
+            with os.scandir(dirname) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if level < depth and not entry.name.startswith('.'):
+                    pending.append((entry.path, level + 1))
+            elif entry.is_file():
+                yield entry.path
+
+
+def snapshot(directory, ignore=(), patterns=None, depth=common.RESULT_CACHE_DEPTH):
+    """Return `relpath -> (mtime, size)` of the possible outputs below `directory`
+
+    With glob `patterns` relative to `directory` only the matching files are
+    considered, else the files at most `depth` directories deep."""
+    if patterns:
+        paths = (path for pattern in patterns
+                 for path in glob.iglob(os.path.join(directory, pattern), recursive=True))
+    else:
+        paths = _shallow_files(directory, depth)
+    files = {}
+    ignore = tuple(os.path.join(os.path.abspath(path), '') for path in ignore)
+    for path in paths:
+        if os.path.abspath(path).startswith(ignore):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if not os.path.isdir(path):
+            files[os.path.relpath(path, directory)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def _copy(source, destination):
+    dirname = os.path.dirname(destination)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    shutil.copyfile(source, destination)
+
+
+class ResultCache(cachedir.CacheDirectory):
+    """Directory of stored results, one sub directory per key"""
+
+    def __init__(self, directory=common.RESULT_CACHE_DIR,
+                 max_size=common.RESULT_CACHE_MAX_SIZE):
+        super(ResultCache, self).__init__(directory, max_size)
+
+    def restore(self, key, destination):
+        """Copy the outputs of `key` into `destination`, return them
+
+        `None` is returned if there is no result for `key`.
+        """
+        meta = self.lookup(key)
+        if meta is None:
+            return None
+        for relpath in meta['outputs']:
+            _copy(self.path(key, 'files', relpath), os.path.join(destination, relpath))
+        return meta['outputs']
+
+    def store(self, key, source, outputs):
+        """Store the files `outputs` relative to `source` as result of `key`"""
+        temporary = self.new_entry()
+        for relpath in outputs:
+            _copy(os.path.join(source, relpath), os.path.join(temporary, 'files', relpath))
+        self.commit(temporary, key, {'outputs': sorted(outputs)})
+
+    def call(self, run, args, key, refresh=False, outputs=None, flush=None):
+        """Call `run(args)` unless the result of `key` can be restored
+
+        The files changed in the working directory by a successful run are
+        stored; runs without output files aren't cached. Only files matching
+        the glob patterns `outputs` are considered if they are given, else
+        the files at most `depth` directories deep, see `snapshot`.
+        `flush()` is called after the run to finish pending output and returns
+        the number of failures; if there are any nothing is stored. Return
+        this number.
+        """
+        cwd = os.getcwd()
+        if not refresh:
+            restored = self.restore(key, cwd)
+            if restored is not None:
+                self.count(True)
+                print('Restored {0} cached files: {1}'.format(len(restored), ' '.join(restored)),
+                      file=sys.stderr)
+                return 0
+        before = snapshot(cwd, ignore=[self.directory], patterns=outputs)
+        run(args)
+        failures = flush() if flush is not None else 0
+        self.count(False)
+        if failures:
+            return failures
+        after = snapshot(cwd, ignore=[self.directory], patterns=outputs)
+        outputs = [relpath for relpath, stat in after.items() if before.get(relpath) != stat]
+        if outputs:
+            self.store(key, cwd, outputs)
+        return 0
+
+
+def describe(name, cache, entry):
+    """Return a line describing `entry` of `cache`"""
+    last_use, size, key = entry
+    meta = cache.meta(key) or {}
+    if name == 'data':
+        what = '{0} ({1})'.format(meta.get('source'), meta.get('parser'))
+    else:
+        what = '{0}  {1} files'.format(key[:12], len(meta.get('outputs', ())))
+    return '  {0}  {1:8.1f} MiB  {2}'.format(
+        time.strftime('%Y-%m-%d %H:%M', time.localtime(last_use)), size / 1024**2, what)
+
+
+def main(args):
+    from . import data  # avoid importing numpy otherwise
+    caches = [('results', ResultCache()), ('data', data.DataCache())]
+    for name, cache in caches:
+        if args.only not in (None, name):
+            continue
+        if args.clear:
+            cache.clear()
+            print('Removed all cached {0}'.format(name))
+            continue
+        if args.prune is not None:
+            removed = cache.evict(int(args.prune * 1024**2))
+            print('Removed {0} cached {1}'.format(removed, name))
+        entries = cache.entries()
+        stats = cache.stats()
+        total = stats['hits'] + stats['misses']
+        print('{0}:'.format(name))
+        print('  entries:  {0}'.format(len(entries)))
+        print('  size:     {0:.1f} of {1:.0f} MiB'.format(
+            sum(size for _, size, _ in entries) / 1024**2, cache.max_size / 1024**2))
+        print('  hits:     {0}'.format(stats['hits']))
+        print('  misses:   {0}'.format(stats['misses']))
+        if total:
+            print('  hit rate: {0:.0%}'.format(stats['hits'] / total))
+        if args.list:
+            for entry in sorted(entries, reverse=True):
+                print(describe(name, cache, entry))
+    if args.only in (None, 'results') and not args.clear and not common.RESULT_CACHE:
+        print('The result cache is disabled, set `enabled = yes` in the `[cache]` section '
+              'to enable it.')
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
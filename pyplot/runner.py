@@ -0,0 +1,124 @@
+"""Run scripts from Python without starting `pyplot`
+
+`run('sub1.toyplot', ['-s', '3'])` runs a script like `pyplot sub1 toyplot -s
+3` would, but inside of the calling process, e.g. a Jupyter notebook. The
+scripts are looked up in the manifest of `configure update`, which is only
+read again once it changed. Imported scripts and their parsers are kept; a
+script is reloaded only if its source changed. `sys.argv` is replaced only
+while the script runs.
+"""
+from __future__ import absolute_import
+
+import importlib
+import os
+import sys
+
+from . import common
+from . import manifest as manifest_
+from . import pyplot
+from .statcache import stat_key
+
+
+class UnknownScript(LookupError):
+    """Raised if a name doesn't select exactly one script"""
+
+
+class Runner(object):
+    """Registry of scripts, keeping the imported modules warm"""
+
+    def __init__(self, roots=None, subs=None, manifest_file=common.MANIFEST_FILE):
+        self.roots = common.ROOT_DIRECTORIES if roots is None else roots
+        self.subs = common.SUB_DIRECTORIES if subs is None else subs
+        self.manifest_file = manifest_file
+        self.manifest_mtime = None
+        self.paths = None
+        self.scripts = {}
+
+    def registry(self):
+        """Return the command paths of the scripts, see `pyplot.script_paths`"""
+        try:
+            mtime = os.stat(self.manifest_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self.paths is None or mtime != self.manifest_mtime:
+            script_manifest = manifest_.Manifest.load(self.manifest_file)
+            self.paths = pyplot.script_paths(self.roots, self.subs, script_manifest)
+            self.manifest_mtime = mtime
+        return self.paths
+
+    def split(self, argv):
+        """Split a command line into the name of the script and its arguments"""
+        paths = self.registry()
+        for length in range(len(argv), 0, -1):
+            if tuple(argv[:length]) in paths:
+                return ' '.join(argv[:length]), list(argv[length:])
+        raise UnknownScript('no script in `{0}`, run `pyplot configure update` if it is new'
+                            .format(' '.join(argv)))
+
+    def resolve(self, name):
+        """Return the manifest entry and command path of the script `name`
+
+        `name` is the path of commands as typed after `pyplot`, separated by
+        spaces or dots, e.g. `'sub1 toyplot'` or `'sub1.toyplot'`."""
+        path = tuple(name.replace('.', ' ').split())
+        matches = self.registry().get(path, [])
+        if len(matches) != 1:
+            raise UnknownScript('{0} {1}, run `pyplot configure update` if it is new'.format(
+                'ambiguous script' if matches else 'unknown script', name))
+        return matches[0][2], path
+
+    def load(self, entry, path, force=False):
+        """Return the module of `entry` and its parser, reload it if it changed
+
+        The parser is `None` for scripts without `get_parser`. With `force`
+        the module is reloaded in any case, e.g. because a helper changed."""
+        filename = entry['file']
+        key = stat_key(os.stat(filename))
+        cached = self.scripts.get(filename)
+        if cached is not None and cached['key'] == key and not force:
+            return cached['module'], cached['parser']
+        file_hash = manifest_.file_hash(filename)
+        if cached is not None and cached['hash'] == file_hash and not force:
+            cached['key'] = key
+            return cached['module'], cached['parser']
+        if cached is None:
+            module = manifest_.import_script(entry['root'],
+                                             entry['namespace'] + '.' + entry['name'])
+        else:
+            module = importlib.reload(cached['module'])
+        parser = None
+        if hasattr(module, 'get_parser'):
+            parser = module.get_parser()
+            parser.prog = 'pyplot ' + ' '.join(path)
+        self.scripts[filename] = {'key': key, 'hash': file_hash,
+                                  'module': module, 'parser': parser}
+        return module, parser
+
+    def run(self, name, argv=(), reload=False):
+        """Run the script `name` with the arguments `argv`, return its result
+
+        Invalid arguments raise `SystemExit` like on the command line."""
+        entry, path = self.resolve(name)
+        module, parser = self.load(entry, path, force=reload)
+        old_argv = sys.argv
+        sys.argv = [entry['name']] + list(argv)
+        try:
+            if parser is None:
+                return module.main()
+            return module.main(parser.parse_args(list(argv)))
+        finally:
+            sys.argv = old_argv
+
+
+_RUNNER = None
+
+
+def run(name, argv=()):
+    """Run the script `name` with the arguments `argv` in this process
+
+    See `Runner.run`, the registry of the configured script directories is
+    shared by all calls."""
+    global _RUNNER
+    if _RUNNER is None:
+        _RUNNER = Runner()
+    return _RUNNER.run(name, argv)
@@ -0,0 +1,199 @@
+"""Serve pyplot from a warm process, scripts are run in forked workers
+
+The server pre-imports the modules listed in the `preload` option of the
+`[server]` section of the configuration file and builds the parser of all
+scripts once. `pyplot-client` forwards its arguments, working directory,
+environment and standard streams to the server, which forks itself for
+every run. Exit codes and signals are passed back to the client.
+"""
+from __future__ import print_function, absolute_import
+
+import argparse
+import importlib
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import traceback
+
+from . import common
+
+HEADER = struct.Struct('!I')
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('--socket', default=common.SERVER_SOCKET,
+                        help='path of the Unix socket to listen on')
+    parser.add_argument('--preload', nargs='*', default=common.PRELOAD,
+                        help='modules to import before serving')
+    return parser
+
+
+def send_message(sock, message, fds=()):
+    """Send the JSON `message`, optionally passing the file descriptors `fds`"""
+    payload = json.dumps(message).encode()
+    if fds:
+        socket.send_fds(sock, [HEADER.pack(len(payload))], list(fds))
+    else:
+        sock.sendall(HEADER.pack(len(payload)))
+    sock.sendall(payload)
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError('connection closed')
+        data += chunk
+    return data
+
+
+def recv_message(sock, maxfds=0):
+    """Return `(message, fds)` sent by `send_message`"""
+    if maxfds:
+        header, fds, _, _ = socket.recv_fds(sock, HEADER.size, maxfds)
+        if len(header) < HEADER.size:
+            header += _recv_exactly(sock, HEADER.size - len(header))
+    else:
+        header, fds = _recv_exactly(sock, HEADER.size), []
+    size, = HEADER.unpack(header)
+    return json.loads(_recv_exactly(sock, size).decode()), fds
+
+
+class Server(object):
+    """Warm process forking a worker for every request"""
+
+    def __init__(self, address, preload=()):
+        for module in preload:
+            importlib.import_module(module)
+        self.address = address
+        self.parser = None
+        self.manifest_mtime = None
+        self.load_parser()
+
+    def load_parser(self):
+        """Build the parser of all scripts if the manifest changed"""
+        from . import pyplot  # avoid circular import
+        try:
+            mtime = os.stat(common.MANIFEST_FILE).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self.parser is None or mtime != self.manifest_mtime:
+            importlib.invalidate_caches()  # scripts may have been added
+            self.parser = pyplot.get_parser(common.ROOT_DIRECTORIES, common.SUB_DIRECTORIES)
+            self.manifest_mtime = mtime
+
+    @staticmethod
+    def reap(*_):
+        """Collect finished sessions"""
+        try:
+            while os.waitpid(-1, os.WNOHANG)[0]:
+                pass
+        except ChildProcessError:
+            pass
+
+    def serve_forever(self):
+        """Accept connections until interrupted"""
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            listener.bind(self.address)
+        finally:
+            os.umask(old_umask)
+        listener.listen(16)
+        signal.signal(signal.SIGCHLD, self.reap)
+        print('Serving on ' + self.address)
+        sys.stdout.flush()
+        try:
+            while True:
+                conn, _ = listener.accept()
+                self.load_parser()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if os.fork() == 0:
+                    listener.close()
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    try:
+                        self.session(conn)
+                    finally:
+                        os._exit(0)
+                conn.close()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            os.remove(self.address)
+
+    def session(self, conn):
+        """Fork the worker for the request on `conn` and report its status"""
+        request, fds = recv_message(conn, maxfds=3)
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            self.run(request, fds)
+        for fd in fds:
+            os.close(fd)
+        send_message(conn, {'pid': pid})
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            send_message(conn, {'signal': os.WTERMSIG(status)})
+        else:
+            send_message(conn, {'returncode': os.WEXITSTATUS(status)})
+        conn.close()
+
+    def run(self, request, fds):
+        """Execute the `request` in the worker process, never returns"""
+        from . import pyplot  # avoid circular import
+        os.setsid()
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, 'r', closefd=False)
+        sys.stdout = open(1, 'w', buffering=1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = open(2, 'w', buffering=1, closefd=False)
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGPIPE):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        sys.argv = ['pyplot'] + request['argv']
+        returncode = 0
+        try:
+            pyplot.main(self.parser.parse_args(request['argv']))
+        except SystemExit as exc:
+            if exc.code is None or isinstance(exc.code, int):
+                returncode = exc.code or 0
+            else:
+                print(exc.code, file=sys.stderr)
+                returncode = 1
+        except KeyboardInterrupt:
+            sys.stdout.flush()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGINT)
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(returncode)
+
+
+def main(args):
+    Server(args.socket, args.preload).serve_forever()
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
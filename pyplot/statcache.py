@@ -0,0 +1,91 @@
+"""Persisted stat information used by `configure update`
+
+For every visited directory its stat and listing and for every candidate
+script its stat and validity are stored. Directories whose stat didn't change
+are not listed again and files whose stat didn't change are not read again.
+"""
+from __future__ import print_function, absolute_import
+
+import json
+import os
+
+from . import common
+from . import walker
+
+
+def stat_key(stat):
+    """Return the part of `stat` which identifies a version of a file"""
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+class StatCache(object):
+    """Stat cache of directories and files
+
+    Lookups are done in the cache of the previous run, while the results of
+    this run are collected anew. This way vanished paths are dropped.
+    """
+
+    def __init__(self, content=None):
+        content = content or {}
+        self.previous_dirs = content.get('dirs', {})
+        self.previous_files = content.get('files', {})
+        self.dirs = {}
+        self.files = {}
+        self.unchanged_dirs = set()
+        self.reused = 0
+        self.rescanned = 0
+
+    @classmethod
+    def load(cls, filename=common.STATCACHE_FILE):
+        """Read the cache, an empty one is returned if it is unusable"""
+        try:
+            with open(filename, 'r') as file_:
+                return cls(json.load(file_))
+        except (IOError, OSError, ValueError):
+            return cls()
+
+    def save(self, filename=common.STATCACHE_FILE):
+        """Write the entries collected in this run to `filename`"""
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with open(filename, 'w') as file_:
+            json.dump({'dirs': self.dirs, 'files': self.files}, file_)
+
+    def listdir(self, dirname):
+        """Return `(dirnames, filenames)` of `dirname`
+
+        The listing of the last run is reused if the directory didn't change,
+        in this case `dirname` is added to `unchanged_dirs`.
+        """
+        key = stat_key(os.stat(dirname))
+        previous = self.previous_dirs.get(dirname)
+        if previous is not None and previous['stat'] == key:
+            self.dirs[dirname] = previous
+            self.unchanged_dirs.add(dirname)
+            return list(previous['dirs']), list(previous['files'])
+        self.record_dir(dirname)
+        listing = self.dirs[dirname]
+        return list(listing['dirs']), list(listing['files'])
+
+    def record_dir(self, dirname):
+        """Store the current stat and listing of `dirname`
+
+        Has to be called again after writing to `dirname`.
+        """
+        key = stat_key(os.stat(dirname))
+        dirnames, filenames = walker.scandir(dirname)
+        self.dirs[dirname] = {'stat': key, 'dirs': dirnames, 'files': filenames}
+
+    def is_valid(self, filename, check):
+        """Return `(valid, unchanged)`, `check(filename)` is only called on change"""
+        key = stat_key(os.stat(filename))
+        previous = self.previous_files.get(filename)
+        if previous is not None and previous[:-1] == key:
+            self.reused += 1
+            self.files[filename] = previous
+            return previous[-1], True
+        self.rescanned += 1
+        valid = check(filename)
+        self.files[filename] = key + [valid]
+        return valid, False
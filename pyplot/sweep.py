@@ -0,0 +1,226 @@
+"""Run a script for every point of a parameter grid
+
+The script is named by its commands as for `pyplot` itself, followed by the
+arguments shared by all points::
+
+    $ pyplot sweep -g start=0:100:10 -g other=a,b sub1 toyplot --dpi 300
+
+The grid is given as `NAME=VALUES` where `NAME` is the destination or an
+option string (without dashes) of an argument of the script and `VALUES` is
+either a comma separated list `a,b,c` or a range `start:stop[:step]` which
+excludes `stop` like Python's `range`. Flags take the values `true`/`false`.
+The grid is validated against the parser of the script before running, the
+points run in a pool of worker processes importing the script only once.
+"""
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import contextlib
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import batch
+from . import mapper
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('-g', '--grid', action='append', required=True, metavar='NAME=VALUES',
+                        help='values of an argument to sweep, repeat for every argument')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='number of worker processes')
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help='script and its arguments, e.g. `sub1 toyplot -s 3`')
+    return parser
+
+
+class SweepError(Exception):
+    """Raised if the grid doesn't match the script"""
+
+
+def find_parser(parser, path):
+    """Return the sub-parser reached by the commands `path`"""
+    for token in path:
+        for action in parser._actions:
+            if isinstance(action, argparse._SubParsersAction) and token in action.choices:
+                parser = action.choices[token]
+                break
+        else:
+            raise SweepError('unknown script ' + ' '.join(path))
+    return parser
+
+
+def split_command(parser, command):
+    """Split `command` into the path of commands and the arguments of the script"""
+    path = []
+    for token in command:
+        try:
+            parser = find_parser(parser, [token])
+        except SweepError:
+            break
+        path.append(token)
+    if not path:
+        raise SweepError('no script in `{0}`'.format(' '.join(command)))
+    return path, list(command[len(path):])
+
+
+def find_action(parser, name):
+    """Return the action of `parser` with destination or option `name`"""
+    for action in parser._actions:
+        options = [option.lstrip(parser.prefix_chars) for option in action.option_strings]
+        if name == action.dest or name in options:
+            if isinstance(action, (argparse._HelpAction, argparse._VersionAction)):
+                raise SweepError('{0} exits the script and can\'t be swept'.format(name))
+            return action
+    raise SweepError('unknown argument ' + name)
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def expand_values(spec):
+    """Return the list of values described by `spec`"""
+    if ',' in spec:
+        return spec.split(',')
+    if ':' in spec:
+        parts = [_number(part) for part in spec.split(':')]
+        if len(parts) not in (2, 3):
+            raise SweepError('invalid range ' + spec)
+        start, stop, step = parts if len(parts) == 3 else parts + [1]
+        if step == 0:
+            raise SweepError('step of range must not be zero: ' + spec)
+        count = max(0, -int(-(stop - start) // step))
+        return [str(start + index * step) for index in range(count)]
+    return [spec]
+
+
+def point_arguments(action, value):
+    """Return the command line arguments setting `action` to `value`"""
+    if action.nargs == 0:
+        if value.lower() in TRUE_VALUES:
+            return [action.option_strings[0]]
+        if value.lower() in FALSE_VALUES:
+            return []
+        raise SweepError('{0} is a flag, use true or false'.format(action.dest))
+    if action.option_strings:
+        return [action.option_strings[0], value]
+    return [value]
+
+
+def expand_grid(script_parser, grid):
+    """Return the list of points `(label, arguments)` of the `grid`"""
+    axes = []
+    for item in grid:
+        name, sep, spec = item.partition('=')
+        if not sep:
+            raise SweepError('grid entries have the form NAME=VALUES: ' + item)
+        action = find_action(script_parser, name)
+        axes.append([(name + '=' + value, point_arguments(action, value))
+                     for value in expand_values(spec)])
+    points = []
+    for combination in itertools.product(*axes):
+        label = ' '.join(label for label, _ in combination)
+        arguments = [arg for _, args in combination for arg in args]
+        points.append((label, arguments))
+    return points
+
+
+def run_points(script, arguments, labels):
+    """Run `script` for the points `labels`, return `(label, error, stdout, wall, stderr)`
+
+    `arguments` maps the labels on the arguments of the points, `error` is
+    `None` for successful runs."""
+    results = []
+    for label in labels:
+        returncode, stdout, stderr, wall, _ = batch.run_job(list(script) + arguments[label])
+        error = None if returncode == 0 else 'exit status {0}'.format(returncode)
+        results.append((label, error, stdout, wall, stderr))
+    return results
+
+
+class Progress(object):
+    """Reports of the finished points, see `mapper.map_chunks`"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+
+    def update(self, results):
+        """Report the `results` of `run_points`"""
+        for label, error, stdout, wall, *stderr in results:  # no stderr if the worker died
+            self.done += 1
+            self.failed += error is not None
+            print('[{number}/{total}] {label}: {status} ({wall:.2f} s)'.format(
+                number=self.done, total=self.total, label=label,
+                status='ok' if error is None else 'failed', wall=wall))
+            if stdout:
+                print(stdout.rstrip('\n'))
+            stderr = stderr[0] if stderr else error
+            if stderr:
+                print(stderr.rstrip('\n'), file=sys.stderr)
+        sys.stdout.flush()
+
+
+def run_sweep(script, points, jobs=None):
+    """Run `script` for all `points` `(label, arguments)`, return the `Progress`
+
+    Every point runs in a worker process. If a point kills its worker, the
+    remaining points run in a new pool."""
+    function = partial(run_points, script, dict(points))
+    chunks = ([label] for label, _ in points)
+    progress = Progress(len(points))
+    with contextlib.ExitStack() as stack:
+        def start():
+            """Return a new pool, shut down when leaving the stack"""
+            return stack.enter_context(ProcessPoolExecutor(max_workers=jobs,
+                                                           initializer=batch.load_parser))
+        mapper.map_chunks(start(), function, chunks, 2 * (jobs or os.cpu_count() or 1),
+                          progress, restart=start)
+    return progress
+
+
+def main(args):
+    from . import pyplot  # avoid circular import
+    parser = batch.load_parser()
+    try:
+        path, shared = split_command(parser, args.command)
+        script_parser = find_parser(parser, path)
+        if 'run' not in script_parser._defaults:
+            raise SweepError(' '.join(path) + ' is not a script')
+        if script_parser._defaults['run'] is pyplot.substitute:
+            raise SweepError('only scripts with `get_parser` can be swept')
+        points = expand_grid(script_parser, args.grid)
+    except SweepError as exc:
+        print('Invalid sweep: ' + str(exc), file=sys.stderr)
+        sys.exit(1)
+    script = path + shared
+    errors = [(label, batch.resolve(parser, script + arguments))
+              for label, arguments in points]
+    errors = [(label, error) for label, error in errors if error]
+    if errors:
+        for label, error in errors:
+            print('{0}: {1}'.format(label, error), file=sys.stderr)
+        sys.exit(1)
+    progress = run_sweep(script, points, args.jobs)
+    if progress.failed:
+        print('{0} of {1} points failed'.format(progress.failed, len(points)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
@@ -0,0 +1,188 @@
+"""Show statistics of recorded script runs
+
+If telemetry is enabled, either by `enabled = yes` in the `[telemetry]`
+section of the configuration file or by setting `PYPLOT_TELEMETRY=1`, every
+run records the script, its arguments, wall and CPU time, peak memory, exit
+status and time stamp. The records are appended to a local file which is
+truncated to its newer half once it exceeds `max_size` KiB.
+"""
+from __future__ import print_function, absolute_import, division
+
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from . import common
+
+
+def get_parser(add_help=True):
+    """Return the ArgumentParser, set add_help=False to use as parent."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0],
+                                     add_help=add_help)
+    parser.add_argument('pattern', nargs='?', default='*',
+                        help='only show scripts matching this pattern')
+    parser.add_argument('-n', '--top', type=int, default=10,
+                        help='number of slowest recent runs to show')
+    parser.add_argument('--recent', type=int, default=100,
+                        help='number of most recent runs searched for the slowest')
+    return parser
+
+
+def peak_rss():
+    """Return the peak resident memory of the process in MiB"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024**2 if sys.platform == 'darwin' else 1024)  # bytes or KiB
+
+
+def append(record, filename=common.TELEMETRY_FILE, max_size=common.TELEMETRY_MAX_SIZE):
+    """Append `record` to the store, keep the newer half if it grows too large"""
+    line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+    try:
+        fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    except OSError:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line)
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size > max_size:
+        with open(filename, 'rb') as file_:
+            file_.seek(size // 2)
+            file_.readline()  # skip the partial line
+            tail = file_.read()
+        temporary = filename + '.tmp'
+        with open(temporary, 'wb') as file_:
+            file_.write(tail)
+        os.replace(temporary, filename)
+
+
+def read(filename=common.TELEMETRY_FILE):
+    """Return the list of all records in the store"""
+    records = []
+    try:
+        with open(filename, 'r') as file_:
+            for line in file_:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:  # interrupted write
+                    continue
+    except (IOError, OSError):
+        pass
+    return records
+
+
+@contextlib.contextmanager
+def record(script, argv):
+    """Record the run of `script` with the arguments `argv` in the body"""
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    status = 0
+    try:
+        yield
+    except SystemExit as exc:
+        status = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+        raise
+    except BaseException:
+        status = 1
+        raise
+    finally:
+        try:
+            append({
+                'script': script,
+                'argv': list(argv),
+                'wall': time.perf_counter() - start_wall,
+                'cpu': time.process_time() - start_cpu,
+                'rss': peak_rss(),
+                'status': status,
+                'time': time.time(),
+            })
+        except (IOError, OSError):
+            pass  # telemetry must never break a run
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of the sorted `values`"""
+    index = max(0, int(round(fraction * len(values) + 0.5)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(records):
+    """Return statistics per script, sorted by the total wall time
+
+    The `trend` is the relative change of the median wall time of the newer
+    half of the runs compared to the older half.
+    """
+    by_script = defaultdict(list)
+    for item in records:
+        by_script[item['script']].append(item)
+    summary = []
+    for script, runs in by_script.items():
+        walls = sorted(run['wall'] for run in runs)
+        half = len(runs) // 2
+        trend = None
+        if half:
+            older = sorted(run['wall'] for run in runs[:half])
+            newer = sorted(run['wall'] for run in runs[half:])
+            if percentile(older, 0.5):
+                trend = percentile(newer, 0.5) / percentile(older, 0.5) - 1
+        summary.append({
+            'script': script,
+            'runs': len(runs),
+            'failures': sum(1 for run in runs if run['status']),
+            'total': sum(walls),
+            'p50': percentile(walls, 0.5),
+            'p95': percentile(walls, 0.95),
+            'rss': max(run['rss'] or 0 for run in runs),
+            'trend': trend,
+        })
+    return sorted(summary, key=lambda item: -item['total'])
+
+
+def main(args):
+    records = [item for item in read() if fnmatch.fnmatchcase(item['script'], args.pattern)]
+    if not records:
+        print('No runs recorded' + ('' if common.TELEMETRY else
+                                    ', set `PYPLOT_TELEMETRY=1` to enable telemetry.'))
+        return
+    summary = summarize(records)
+    width = max(len(item['script']) for item in summary)
+    template = ('{script:{width}}  {runs:>5}  {failures:>5}  {total:>9}  {p50:>8}  {p95:>8}'
+                '  {rss:>8}  {trend:>6}')
+    print(template.format(script='script', width=width, runs='runs', failures='fail',
+                          total='total/s', p50='p50/s', p95='p95/s', rss='rss/MiB', trend='trend'))
+    print('-' * (width + 64))
+    for item in summary:
+        trend = '' if item['trend'] is None else '{0:+.0%}'.format(item['trend'])
+        print(template.format(
+            script=item['script'], width=width, runs=item['runs'], failures=item['failures'],
+            total='{0:.2f}'.format(item['total']), p50='{0:.3f}'.format(item['p50']),
+            p95='{0:.3f}'.format(item['p95']), rss='{0:.1f}'.format(item['rss']), trend=trend,
+        ))
+    print()
+    print('Slowest of the last {0} runs:'.format(args.recent))
+    recent = sorted(records[-args.recent:], key=lambda item: -item['wall'])[:args.top]
+    for item in recent:
+        print('{when}  {wall:8.3f} s  status {status}  {script} {argv}'.format(
+            when=time.strftime('%Y-%m-%d %H:%M', time.localtime(item['time'])),
+            wall=item['wall'], status=item['status'], script=item['script'],
+            argv=' '.join(item['argv'])))
+    sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    PARSER = get_parser()
+    ARGS = PARSER.parse_args()
+    main(ARGS)
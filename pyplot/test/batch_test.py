@@ -0,0 +1,61 @@
+"""
+Tests to check some functionality of `batch`
+"""
+import argparse
+import os
+from textwrap import dedent
+
+import pytest
+
+from .. import batch
+
+
+def test_read_jobs(tmpdir):
+    """Commands are split and dependencies are kept"""
+    jobfile = tmpdir.join('jobs.toml')
+    jobfile.write(dedent(
+        """\
+        [jobs.first]
+        command = "sub1 toyplot --start 3"
+
+        [jobs.second]
+        command = ["toyplotwparse", "-s", "1"]
+        after = ["first"]
+        """
+    ))
+    jobs = batch.read_jobs(str(jobfile))
+    assert jobs == {'first': (['sub1', 'toyplot', '--start', '3'], []),
+                    'second': (['toyplotwparse', '-s', '1'], ['first'])}
+
+
+def test_cyclic_jobs():
+    """Cyclic dependencies are rejected"""
+    jobs = {'a': ([], ['b']), 'b': ([], ['c']), 'c': ([], ['a'])}
+    with pytest.raises(batch.JobError):
+        batch.check_acyclic(jobs)
+
+
+def test_resolve_messages():
+    """Errors are reported by their last line, `--help` is valid"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--start', type=int)
+    assert batch.resolve(parser, ['--start', '1']) is None
+    assert batch.resolve(parser, ['--help']) is None
+    assert 'invalid int value' in batch.resolve(parser, ['--start', 'x'])
+    parser.error = lambda message: parser.exit(2)
+    assert batch.resolve(parser, ['--start', 'x']) == 'exit status 2'
+
+
+def crash(argv):
+    """kill the worker process"""
+    os._exit(1)
+
+
+def test_dead_worker_fails_remaining_jobs(monkeypatch):
+    """A broken pool fails the running and waiting jobs"""
+    monkeypatch.setattr(batch, 'load_parser', lambda: None)
+    monkeypatch.setattr(batch, 'run_job', crash)
+    jobs = {'first': ([], []), 'second': ([], ['first'])}
+    results = batch.run_jobs(jobs, max_workers=1, report=lambda *args, **kwargs: None)
+    assert {name: result['status'] for name, result in results.items()} == {
+        'first': 'failed', 'second': 'failed'}
@@ -0,0 +1,64 @@
+"""
+Tests to check some functionality of `bundle`
+"""
+import importlib.util
+import sys
+
+from .. import bundle
+from .. import finder
+from .. import manifest
+
+
+def make_bundle(tmpdir):
+    """bundled script directory and a finder using the bundle"""
+    root = tmpdir.mkdir('scripts')
+    root.join('plot.py').write('VALUE = 1\n')
+    nested = root.mkdir('nested')
+    nested.join('helper.py').write('VALUE = 2\n')
+    bundle_dir = str(tmpdir.join('bundles'))
+    assert bundle.build(str(root), bundle.bundle_file(str(root), bundle_dir)) == (2, 0)
+    script_finder = finder.ScriptFinder(bundle_dir=bundle_dir)
+    script_finder.add(str(root))
+    return root, script_finder
+
+
+def test_unchanged_modules_come_from_bundle(tmpdir):
+    """modules, namespaces and their bytecode are found in the archive"""
+    root, script_finder = make_bundle(tmpdir)
+    spec = script_finder.find_spec('scripts.nested.helper')
+    assert isinstance(spec.loader, bundle.BundleLoader)
+    assert spec.origin == str(root.join('nested', 'helper.py'))
+    assert script_finder.find_spec('scripts.nested').submodule_search_locations == [
+        str(root.join('nested'))]
+    code = spec.loader.get_code('scripts.nested.helper')
+    assert code.co_filename == str(root.join('nested', 'helper.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.VALUE == 2
+
+
+def test_bundled_modules_describe_their_source(tmpdir):
+    """`__file__` names the source, so bundled scripts can be described"""
+    root, script_finder = make_bundle(tmpdir)
+    spec = script_finder.find_spec('scripts.plot')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    entry = manifest.describe_module(module, 'plot', 'scripts', str(root))
+    assert entry['file'] == str(root.join('plot.py'))
+    assert entry['hash'] == manifest.file_hash(str(root.join('plot.py')))
+
+
+def test_archive_per_python_version(tmpdir):
+    """archives of other interpreters are never opened"""
+    filename = bundle.bundle_file(str(tmpdir), str(tmpdir))
+    assert filename.endswith('.{0}.zip'.format(sys.implementation.cache_tag))
+
+
+def test_changed_modules_come_from_directory(tmpdir):
+    """modified and new modules fall back to the live directory"""
+    root, script_finder = make_bundle(tmpdir)
+    root.join('plot.py').write('VALUE = 10\n')
+    root.join('new.py').write('')
+    assert script_finder.find_spec('scripts.plot').origin == str(root.join('plot.py'))
+    assert script_finder.find_spec('scripts.new').origin == str(root.join('new.py'))
+    assert script_finder.find_spec('scripts.missing') is None
@@ -0,0 +1,38 @@
+"""
+Tests to check some functionality of `bytecode`
+"""
+import importlib
+import sys
+
+from .. import bytecode
+
+
+def test_compile_file(tmpdir):
+    """bytecode is written below the prefix and invalidated by the hash"""
+    prefix = str(tmpdir.join('pycache'))
+    script = tmpdir.mkdir('scripts').join('plot.py')
+    script.write('VALUE = 1\n')
+    cached = bytecode.cache_from_source(str(script), prefix)
+    assert cached.startswith(prefix)
+    assert bytecode.compile_file(str(script), prefix) == 'compiled'
+    assert bytecode.compile_file(str(script), prefix) == 'current'
+    script.write('VALUE = 2\n')
+    assert bytecode.read(cached, script.read_binary()) is None
+    assert bytecode.compile_file(str(script), prefix) == 'compiled'
+    script.write('VALUE = \n')
+    assert bytecode.compile_file(str(script), prefix).startswith('SyntaxError')
+
+
+def test_pycache_prefix_compatible(tmpdir, monkeypatch):
+    """the standard import system accepts the written bytecode"""
+    prefix = str(tmpdir.join('pycache'))
+    scripts = tmpdir.mkdir('scripts')
+    scripts.join('bytecode_plot.py').write('VALUE = 3\n')
+    bytecode.compile_file(str(scripts.join('bytecode_plot.py')), prefix)
+    monkeypatch.setattr(sys, 'pycache_prefix', prefix)
+    monkeypatch.syspath_prepend(str(scripts))
+    try:
+        module = importlib.import_module('bytecode_plot')
+        assert module.__cached__ == bytecode.cache_from_source(module.__file__, prefix)
+    finally:
+        sys.modules.pop('bytecode_plot', None)
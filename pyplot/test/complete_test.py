@@ -0,0 +1,30 @@
+"""
+Tests to check some functionality of `complete`
+"""
+from os import path
+
+import pytest
+
+from .. import complete
+from .. import pyplot
+
+DIRECTORY = path.join(path.dirname(__file__), 'script_dir')
+
+
+@pytest.fixture(scope='module')
+def index():
+    """completion index of the test scripts"""
+    return complete.build_index(pyplot.get_parser([DIRECTORY, ], []))
+
+
+@pytest.mark.parametrize("line, expected", [
+    ('pyplot to', ['toyplot', 'toyplotwparse']),
+    ('pyplot toyplotwparse --', ['--help', '--start']),
+    ('pyplot configure clean -', ['--dryrun', '--help', '-d', '-h']),
+    ('pyplot configure ', ['addroot', 'addsub', 'audit', 'bundle', 'clean', 'compile', 'rmdir',
+                           'update', 'watch']),
+])
+def test_completions(index, line, expected):
+    """completions are found in the index"""
+    words, prefix = complete.split_line(line)
+    assert complete.get_completions(index, words[1:], prefix) == expected
@@ -8,7 +8,9 @@ Tests to check some functionality of `configure`
 # PATH = path.abspath(path.dirname(__file__))
 # syspath.insert(0, path.join(PATH, pardir))
 
+import argparse
 from textwrap import dedent
+from .. import common
 from .. import configure
 
 
@@ -25,3 +27,87 @@ def test_template():
         ]"""
     )
     assert filled == correct
+
+
+def test_heaviest_imports():
+    """the cumulative import times between the markers are sorted"""
+    marker = configure.Auditor.MARKER + '\n'
+    importtime = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       100 |        100 | resource\n' + marker +
+        'import time:       100 |        100 |   re\n'
+        'import time:       300 |       3000 | numpy\n'
+        'import time:        10 |         10 | scripts.plot\n' + marker
+    )
+    imports = configure.Auditor.heaviest_imports(importtime, ['scripts'], top=3)
+    assert imports == [(3e-3, 'numpy'), (1e-4, 're')]
+
+
+def test_write_init_only_changes(tmpdir):
+    """unchanged `__init__` files are not written again"""
+    journal = configure.Journal()
+    init = tmpdir.join('__init__.py')
+    assert configure.Updater.write_init(str(tmpdir), {'foo', 'bar'}, journal)
+    init.setmtime(1)
+    assert not configure.Updater.write_init(str(tmpdir), {'bar', 'foo'}, journal)
+    assert init.mtime() == 1
+    assert configure.Updater.write_init(str(tmpdir), {'foo'}, journal)
+    assert tmpdir.listdir() == [init]
+    assert journal.is_unmodified(str(init), init.read())
+
+
+def test_write_init_keeps_mode(tmpdir):
+    """rewritten `__init__` files keep their permissions"""
+    init = tmpdir.join('__init__.py')
+    configure.Updater.write_init(str(tmpdir), {'foo'})
+    init.chmod(0o640)
+    assert configure.Updater.write_init(str(tmpdir), {'bar'})
+    assert init.stat().mode & 0o777 == 0o640
+
+
+def test_clean_removes_generated(tmpdir):
+    """only unmodified files of the journal are removed"""
+    journal = configure.Journal()
+    for name in ('generated', 'modified', 'handwritten'):
+        tmpdir.mkdir(name)
+    configure.Updater.write_init(str(tmpdir.join('generated')), {'foo'}, journal)
+    configure.Updater.write_init(str(tmpdir.join('modified')), {'foo'}, journal)
+    tmpdir.join('modified', '__init__.py').write('import foo\n', mode='a')
+    tmpdir.join('handwritten', '__init__.py').write('"""a package"""\n')
+    removed = configure.Updater.remove_generated(journal, dryrun=False)
+    assert removed == [str(tmpdir.join('generated', '__init__.py'))]
+    assert tmpdir.join('modified', '__init__.py').check()
+    assert tmpdir.join('handwritten', '__init__.py').check()
+    assert configure.Updater.is_generated(configure.Updater.render_init(['foo']))
+    assert not configure.Updater.is_generated('"""a package"""\n')
+    unsorted = configure.Updater.tformatter.format(configure.Updater.template,
+                                                   lines=['zeta', 'alpha'])
+    assert configure.Updater.is_generated(unsorted)
+
+
+def test_describe_dir_imports_edited_scripts(tmpdir):
+    """a long running process describes the current source of imported scripts"""
+    root = tmpdir.mkdir('watched_scripts')
+    script = root.join('plot.py')
+    template = ('import argparse\nNAMES = {0!r}\n\n\n'
+                'def get_parser(add_help=True):\n'
+                '    parser = argparse.ArgumentParser(add_help=add_help)\n'
+                '    for name in NAMES:\n'
+                '        parser.add_argument("--" + name)\n'
+                '    return parser\n\n\ndef main(args):\n    pass\n')
+    for names in (['alpha'], ['alpha', 'beta']):
+        script.write(template.format(names))
+        entry, = configure.Updater.describe_dir(str(root), str(root), {'plot'})
+        assert [argument['dest'] for argument in entry['arguments']] == names
+
+
+def test_clean_removes_cache_files(tmpdir, monkeypatch):
+    """the manifest, indices and the registry are removed"""
+    names = ('MANIFEST_FILE', 'STATCACHE_FILE', 'COMPLETION_INDEX', 'JOURNAL_FILE',
+             'REGISTRY_FILE')
+    for name in names:
+        tmpdir.join(name).write('')
+        monkeypatch.setattr(common, name, str(tmpdir.join(name)))
+    monkeypatch.setattr(configure.Journal, 'load', classmethod(lambda cls: cls({})))
+    configure.Updater.clean(argparse.Namespace(dryrun=False))
+    assert tmpdir.listdir() == []
@@ -0,0 +1,26 @@
+"""
+Fixtures shared by all tests
+"""
+import pytest
+
+from .. import common
+from .. import finder
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache(tmpdir_factory):
+    """keep the finder away from the bundles and bytecode in the cache of the user
+
+    Session scoped, so it also applies to fixtures of larger scope."""
+    base = tmpdir_factory.getbasetemp()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(finder.FINDER, 'bundle_dir', str(base.join('bundles')))
+        monkeypatch.setattr(finder.FINDER, 'pycache_prefix', str(base.join('pycache')))
+        monkeypatch.setattr(common, 'PYCACHE_PREFIX', str(base.join('pycache')))
+        yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_finder(monkeypatch):
+    """forget the bundles opened by other tests"""
+    monkeypatch.setattr(finder.FINDER, 'bundles', {})
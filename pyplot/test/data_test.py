@@ -0,0 +1,54 @@
+"""
+Tests to check some functionality of `data`
+"""
+import os
+
+import pytest
+
+from .. import data
+
+np = pytest.importorskip('numpy')
+
+
+@data.parser('counted')
+def parse_counted(filename):
+    """text parser counting its calls"""
+    parse_counted.calls += 1
+    return {'values': np.loadtxt(filename), 'squares': np.loadtxt(filename)**2}
+
+
+parse_counted.calls = 0
+
+
+def test_parsed_once_and_memory_mapped(tmpdir):
+    """the second load maps the stored arrays instead of parsing"""
+    cache = data.DataCache(str(tmpdir.join('cache')), max_size=1024**2)
+    source = tmpdir.join('input.dat')
+    source.write('1 2\n3 4\n')
+    calls = parse_counted.calls
+    first = cache.load(str(source), 'counted')
+    second = cache.load(str(source), 'counted')
+    assert parse_counted.calls == calls + 1
+    assert isinstance(second['values'], np.memmap)
+    assert not second['values'].flags.writeable
+    np.testing.assert_array_equal(first['squares'], [[1, 4], [9, 16]])
+    np.testing.assert_array_equal(second['squares'], first['squares'])
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_changed_file_is_parsed_again(tmpdir):
+    """size and modification time are part of the key"""
+    cache = data.DataCache(str(tmpdir.join('cache')), max_size=1024**2)
+    source = tmpdir.join('input.dat')
+    source.write('1 2\n')
+    np.testing.assert_array_equal(cache.load(str(source)), [1, 2])
+    source.write('1 2 3\n')
+    os.utime(str(source), ns=(0, 0))
+    np.testing.assert_array_equal(cache.load(str(source)), [1, 2, 3])
+    assert len(cache.entries()) == 2
+
+
+def test_unknown_parser(tmpdir):
+    """unknown parsers are reported with the known ones"""
+    with pytest.raises(KeyError, match='text'):
+        data.DataCache(str(tmpdir)).load(str(tmpdir), 'missing')
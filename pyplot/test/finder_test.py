@@ -0,0 +1,48 @@
+"""
+Tests to check some functionality of `finder`
+"""
+import importlib
+import sys
+
+from .. import finder
+
+
+def test_import_without_init(tmpdir):
+    """scripts in directories without `__init__.py` are importable"""
+    root = tmpdir.mkdir('finder_scripts')
+    root.mkdir('nested').join('plot.py').write('VALUE = 42\n')
+    finder.install([str(root)])
+    try:
+        module = importlib.import_module('finder_scripts.nested.plot')
+        assert module.VALUE == 42
+        assert module.__file__ == str(root.join('nested', 'plot.py'))
+    finally:
+        for name in [name for name in sys.modules if name.startswith('finder_scripts')]:
+            del sys.modules[name]
+
+
+def test_missing_names_are_cached(tmpdir):
+    """unknown modules are looked up only once until the caches are invalidated"""
+    root = tmpdir.mkdir('scripts')
+    script_finder = finder.ScriptFinder()
+    script_finder.add(str(root))
+    assert script_finder.find_spec('scripts.plot') is None
+    assert 'scripts.plot' in script_finder.missing
+    root.join('plot.py').write('')
+    assert script_finder.find_spec('scripts.plot') is None
+    script_finder.invalidate_caches()
+    assert script_finder.find_spec('scripts.plot').origin == str(root.join('plot.py'))
+    assert script_finder.find_spec('other.plot') is None
+
+
+def test_package_precedence(tmpdir):
+    """packages with `__init__.py` win over modules, modules over namespaces"""
+    root = tmpdir.mkdir('scripts')
+    root.join('plot.py').write('')
+    root.mkdir('plot')
+    root.mkdir('package').join('__init__.py').write('')
+    root.join('package.py').write('')
+    script_finder = finder.ScriptFinder()
+    script_finder.add(str(root))
+    assert script_finder.locate('scripts.plot') == (str(root.join('plot.py')), False)
+    assert script_finder.locate('scripts.package') == (str(root.join('package')), True)
@@ -0,0 +1,62 @@
+"""
+Tests to check some functionality of `inspection`
+"""
+from os import path
+from textwrap import dedent
+
+import pytest
+
+from .. import inspection
+
+DIRECTORY = path.join(path.dirname(__file__), 'script_dir')
+
+
+def test_inspect_argparse_script():
+    """The parser of `toyplotwparse` is extracted without import"""
+    info = inspection.inspect_file(path.join(DIRECTORY, 'toyplotwparse.py'))
+    assert info['doc'] == 'toy script to test with.'
+    assert info['get_parser'] == 1 and info['main'] == 1
+    assert info['parser'].parse_args(['-s', '3']).start == 3
+
+
+def test_inspect_argv_script():
+    """Scripts without `get_parser` only provide the main function"""
+    info = inspection.inspect_file(path.join(DIRECTORY, 'toyplot.py'))
+    assert info['get_parser'] is None and info['main'] == 0
+    assert info['parser'] is None
+
+
+def test_inspect_dynamic_parser():
+    """Parsers which aren't literal can't be resolved"""
+    source = dedent(
+        """\
+        import argparse
+        CHOICES = ['a', 'b']
+
+        def get_parser(add_help=True):
+            parser = argparse.ArgumentParser(add_help=add_help)
+            parser.add_argument('choice', choices=CHOICES)
+            return parser
+
+        def main(args):
+            pass
+        """
+    )
+    info = inspection.inspect_source(source)
+    assert info['get_parser'] == 1 and info['parser'] is None
+
+
+@pytest.mark.parametrize("source", [
+    'from common import get_parser\ndef main(args):\n    pass\n',
+    'from common import *\ndef main(args):\n    pass\n',
+    'import common\nget_parser = common.parser_factory\n',
+    'try:\n    from fast import get_parser\nexcept ImportError:\n'
+    '    def get_parser(add_help=True):\n        pass\n',
+])
+def test_inspect_bound_parser(source):
+    """`get_parser` bound otherwise than by a plain definition is dynamic"""
+    info = inspection.inspect_source(source)
+    assert 'get_parser' in info['dynamic']
+    assert info['get_parser'] is None and info['parser'] is None
+    redefined = inspection.inspect_source(source + 'def get_parser(add_help=True):\n    pass\n')
+    assert 'get_parser' not in redefined['dynamic'] and redefined['get_parser'] == 1
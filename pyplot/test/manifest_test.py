@@ -0,0 +1,64 @@
+"""
+Tests to check some functionality of `manifest`
+"""
+import argparse
+from os import path
+
+import pytest
+
+from .. import manifest
+from .. import pyplot
+from ..configure import Updater
+
+DIRECTORY = path.join(path.dirname(__file__), 'script_dir')
+
+
+def build_manifest():
+    """Return the manifest of the test scripts"""
+    script_manifest = manifest.Manifest()
+    for dirpath in (DIRECTORY, path.join(DIRECTORY, 'sub1'), path.join(DIRECTORY, 'sub2')):
+        script_manifest.entries.extend(
+            Updater.describe_dir(dirpath, DIRECTORY, Updater.get_modules(dirpath))
+        )
+    return script_manifest
+
+
+def test_serialize_roundtrip():
+    """A serialized parser parses like the original"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-s', '--start', type=int, default=0)
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument('files', nargs='*')
+    rebuilt = argparse.ArgumentParser()
+    manifest.add_arguments(rebuilt, manifest.serialize_parser(parser))
+    argv = ['-s', '3', '-v', 'a', 'b']
+    assert rebuilt.parse_args(argv) == parser.parse_args(argv)
+
+
+def test_manifest_save_load(tmpdir):
+    """The manifest survives a save and load cycle"""
+    filename = str(tmpdir.join('manifest.json'))
+    script_manifest = build_manifest()
+    script_manifest.save(filename)
+    loaded = manifest.Manifest.load(filename)
+    assert loaded.entries == script_manifest.entries
+    assert all(manifest.Manifest.is_fresh(entry) for entry in loaded.entries)
+
+
+@pytest.mark.parametrize("roots, subs, arguments", [
+    ([DIRECTORY], [], ('toyplotwparse', '-s', '3')),
+    ([DIRECTORY], [], ('sub1', 'toyplot', 'foo')),
+    ([], [DIRECTORY], ('script_dir', 'toyplot', 'foo')),
+])
+def test_parser_from_manifest(roots, subs, arguments):
+    """The parser tree is built from the manifest"""
+    parser = pyplot.get_parser(roots, subs, build_manifest())
+    args = parser.parse_args(arguments)
+    assert isinstance(args.run, manifest.LazyMain) or isinstance(args.main, manifest.LazyMain)
+
+
+def test_imported_parser_is_unresolved(tmpdir):
+    """scripts importing `get_parser` have to be described by importing them"""
+    script = tmpdir.join('plot.py')
+    script.write('from common import get_parser\n\n\ndef main(args):\n    pass\n')
+    assert manifest.describe_file(str(script), 'plot', 'scripts', str(tmpdir)) is None
@@ -0,0 +1,74 @@
+"""
+Tests to check some functionality of `mapper`
+"""
+import contextlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .. import mapper
+
+
+def test_inputs_from_globs_and_stdin(tmpdir):
+    """globs are expanded, `-` reads one file per line"""
+    tmpdir.join('a.dat').write('')
+    tmpdir.join('b.dat').write('')
+    pattern = str(tmpdir.join('*.dat'))
+    stdin = io.StringIO('first\n\nsecond\n')
+    inputs = list(mapper.iter_inputs([pattern, '-', 'literal'], stdin))
+    assert sorted(inputs[:2]) == [str(tmpdir.join('a.dat')), str(tmpdir.join('b.dat'))]
+    assert inputs[2:] == ['first', 'second', 'literal']
+    assert list(mapper.chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_window_bounds_chunks_in_flight():
+    """no more than `window` chunks run, failures are counted per file"""
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def function(chunk):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.001)
+        with lock:
+            state['running'] -= 1
+        return [(name, 'odd' if name % 2 else None, '', 0.) for name in chunk]
+    progress = mapper.Progress(io.StringIO())
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        mapper.map_chunks(executor, function, mapper.chunked(range(100), 3), 2, progress)
+    assert state['peak'] <= 2
+    assert (progress.done, progress.failed) == (100, 50)
+    assert 'failed 99: odd' in progress.stream.getvalue()
+
+
+def crash_on(chunk):
+    """kill the worker for the chunk containing `crash`"""
+    if 'crash' in chunk:
+        os._exit(1)
+    return [(name, None, '', 0.) for name in chunk]
+
+
+def test_dead_worker_fails_its_chunk():
+    """the files in flight fail, the remaining ones run in a new pool"""
+    chunks = [['a', 'b'], ['crash', 'c'], ['d'], ['e']]
+    progress = mapper.Progress(io.StringIO())
+    with contextlib.ExitStack() as stack:
+        def start():
+            return stack.enter_context(ProcessPoolExecutor(max_workers=1))
+        mapper.map_chunks(start(), crash_on, chunks, 1, progress, restart=start)
+    assert (progress.done, progress.failed) == (6, 2)
+    assert 'failed crash: worker process died' in progress.stream.getvalue()
+    progress = mapper.Progress(io.StringIO())
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        mapper.map_chunks(executor, crash_on, chunks, 1, progress)
+    assert (progress.done, progress.failed) == (4, 2)
+
+
+def test_progress_uses_current_stderr(capsys):
+    """the default stream is looked up when reporting"""
+    progress = mapper.Progress()
+    progress.update([('name', 'broken', '', 0.)])
+    assert 'failed name: broken' in capsys.readouterr().err
@@ -0,0 +1,46 @@
+"""
+Tests to check some functionality of `output`
+"""
+import pytest
+
+from .. import output
+
+
+class Figure(object):
+    """picklable stand-in for a matplotlib figure"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def savefig(self, filename, format, **kwargs):
+        if format == 'pdf':
+            raise ValueError('unsupported format')
+        with open(filename, 'w') as file_:
+            file_.write(self.text + str(kwargs))
+
+
+class Unpicklable(Figure):
+    """figure which can't be sent to a worker"""
+
+    def __reduce__(self):
+        raise TypeError('not picklable')
+
+
+def test_export_queue(tmpdir):
+    """figures are written by the workers, failures are reported per file"""
+    queue = output.ExportQueue(workers=2, max_pending=1)
+    for index in range(3):
+        queue.submit(Figure(str(index)), tmpdir.join('figures', str(index)), ('png',), dpi=1)
+    queue.submit(Figure('x'), tmpdir.join('broken'), ('png', 'pdf'))
+    with pytest.raises(TypeError, match='not picklable'):
+        queue.submit(Unpicklable('y'), tmpdir.join('unpicklable'))
+    changed = Figure('before')
+    queue.submit(changed, tmpdir.join('changed'))
+    changed.text = 'after'
+    results = queue.shutdown()
+    assert tmpdir.join('figures', '2.png').read() == "2{'dpi': 1}"
+    assert tmpdir.join('changed.png').read() == 'before{}'
+    errors = {filename: error for filename, _, error in results}
+    assert len(errors) == 6
+    assert errors[str(tmpdir.join('broken.png'))] is None
+    assert 'unsupported format' in errors[str(tmpdir.join('broken.pdf'))]
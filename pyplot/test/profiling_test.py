@@ -0,0 +1,37 @@
+"""
+Tests to check some functionality of `profiling`
+"""
+import pstats
+
+from .. import profiling
+
+
+def work(count):
+    """function with measurable own time"""
+    return sum(index * index for index in range(count))
+
+
+def test_phases_are_written(tmpdir, capsys):
+    """import and main get their own pstats, stacks are prefixed by phase"""
+    loaded = []
+    result = profiling.profile(work, 50000, 'sub1.toy plot', load=lambda: loaded.append(1),
+                               directory=str(tmpdir))
+    assert result == sum(index * index for index in range(50000))
+    assert loaded == [1]
+    names = sorted(path.basename for path in tmpdir.listdir())
+    assert [name.split('-', 1)[0] for name in names] == ['sub1.toy_plot'] * 3
+    assert [name.split('.', 2)[-1] for name in names] == [
+        'folded', 'import.pstats', 'main.pstats']
+    stacks = tmpdir.join(names[0]).read().splitlines()
+    assert any(line.startswith('main;') and 'work (profiling_test.py' in line
+               for line in stacks)
+    assert 'main' in capsys.readouterr().err
+
+
+def test_collapsed_stacks_keep_total_time():
+    """splitting the time between callers keeps the total"""
+    profiler = profiling.cProfile.Profile()
+    profiler.runcall(work, 20000)
+    stats = pstats.Stats(profiler)
+    stacks = profiling.collapsed_stacks(stats)
+    assert abs(sum(stacks.values()) - stats.total_tt) <= 0.01 * stats.total_tt
@@ -9,6 +9,7 @@ from os import path
 
 from .. import pyplot
 from ..configure import Updater
+from .manifest_test import build_manifest
 
 DIRECTORY = path.join(path.dirname(__file__), 'script_dir')
 
@@ -30,3 +31,52 @@ def test_trivial(arguments, capsys):
                 parser.parse_args([arg, '--help'])
     out, err = capsys.readouterr()
     assert 'usage: 'in out
+
+
+@pytest.mark.parametrize("roots, subs, arguments, selected", [
+    ([DIRECTORY], [], ['toyplotwparse', '-s', '3'], True),
+    ([DIRECTORY], [], ['--refresh', 'sub1', 'toyplot', 'foo'], True),
+    ([], [DIRECTORY], ['script_dir', 'toyplot', '--help'], True),
+    ([DIRECTORY], [], ['configure', 'clean'], True),
+    ([DIRECTORY], [], ['sub1', '--help'], False),
+    ([DIRECTORY], [], ['--version'], False),
+    ([DIRECTORY], [DIRECTORY], ['toyplot'], True),
+])
+def test_dispatch_parser(roots, subs, arguments, selected):
+    """only the selected script is registered, namespaces use the full tree"""
+    script_manifest = build_manifest()
+    parser = pyplot.dispatch_parser(arguments, roots, subs, script_manifest)
+    assert (parser is not None) == selected
+    if parser is None or '--help' in arguments:
+        return
+    full_args = pyplot.get_parser(roots, subs, script_manifest).parse_args(arguments)
+    args = parser.parse_args(arguments)
+    assert sorted(vars(args)) == sorted(vars(full_args))
+    assert pyplot.script_name(args) == pyplot.script_name(full_args)
+
+
+def test_scripts_named_like_commands(tmpdir, capsys):
+    """root scripts shadow the commands of pyplot, except `configure`"""
+    root = tmpdir.mkdir('command_scripts')
+    for name in ('map', 'configure'):
+        root.join(name + '.py').write(
+            'import argparse\n\n\ndef get_parser(add_help=True):\n'
+            '    parser = argparse.ArgumentParser(add_help=add_help)\n'
+            '    parser.add_argument("--' + name + '-option")\n'
+            '    return parser\n\n\ndef main(args):\n    pass\n')
+    script_manifest = pyplot.manifest_.Manifest()
+    script_manifest.entries.extend(
+        Updater.describe_dir(str(root), str(root), Updater.get_modules(str(root))))
+    for manifest in (pyplot.manifest_.Manifest(), script_manifest):
+        parser = pyplot.get_parser([str(root)], [], manifest)
+        assert 'hidden by the command' in capsys.readouterr().err
+        assert parser.parse_args(['map', '--map-option', '1']).map_option == '1'
+        assert parser.parse_args(['configure', 'clean']).run is pyplot.configure.main
+    dispatched = pyplot.dispatch_parser(['map', '--map-option', '1'], [str(root)], [],
+                                        script_manifest)
+    assert dispatched.parse_args(['map', '--map-option', '1']).map_option == '1'
+    dispatched = pyplot.dispatch_parser(['map', 'sub1', 'toyplot'], [DIRECTORY], [],
+                                        build_manifest())
+    args = dispatched.parse_args(['map', '-i', 'a.dat', 'sub1', 'toyplot', '-s', '3'])
+    assert args.run is pyplot.mapper.main
+    assert (args.input, args.command) == (['a.dat'], ['sub1', 'toyplot', '-s', '3'])
@@ -0,0 +1,44 @@
+"""
+Tests to check some functionality of `registry`
+"""
+from os import path
+
+import pytest
+
+from .. import pyplot
+from .. import registry
+from .manifest_test import build_manifest
+
+DIRECTORY = path.join(path.dirname(__file__), 'script_dir')
+
+
+@pytest.fixture
+def script_registry(tmpdir):
+    """registry of the test scripts added as root"""
+    paths = pyplot.script_paths([DIRECTORY], [], build_manifest())
+    script_registry = registry.Registry(str(tmpdir.join('registry.sqlite')))
+    script_registry.write(paths)
+    return script_registry
+
+
+def test_search_ranks_paths_first(script_registry):
+    """words are matched as prefixes, matches in the path rank highest"""
+    matches = script_registry.search('toyplotw')
+    assert [match[0] for match in matches] == ['toyplotwparse']
+    assert [match[0] for match in script_registry.search('sub1 toy')] == ['sub1 toyplot']
+    assert script_registry.search('nothing-like-this') == []
+
+
+def test_lookup_matches_script_paths(script_registry):
+    """lookups return the prefixes of the tokens like `script_paths`"""
+    paths = script_registry.lookup(['sub1', 'toyplot', '-s'], [DIRECTORY], [])
+    expected = pyplot.script_paths([DIRECTORY], [], build_manifest())
+    assert paths == {('sub1', 'toyplot'): expected['sub1', 'toyplot']}
+    assert script_registry.lookup(['toyplot'], [DIRECTORY], [DIRECTORY]) is None
+
+
+def test_missing_registry(tmpdir):
+    """without database nothing is found"""
+    missing = registry.Registry(str(tmpdir.join('missing.sqlite')))
+    assert missing.lookup(['toyplot'], [DIRECTORY], []) is None
+    assert missing.search('toyplot') is None
@@ -0,0 +1,36 @@
+"""
+Tests to check some functionality of `rerun`
+"""
+import sys
+
+from .. import rerun
+
+
+def test_watched_files(tmpdir):
+    """the script, its helpers and its inputs are watched"""
+    root = tmpdir.mkdir('rerun_scripts')
+    root.join('helper.py').write('VALUE = 1\n')
+    script = root.join('plot.py')
+    script.write('from . import helper\nPYPLOT_INPUTS = ["*.csv"]\ndef main(args):\n    pass\n')
+    entry = {'file': str(script), 'root': str(root)}
+    with tmpdir.as_cwd():
+        tmpdir.join('data.csv').write('1,2')
+        tmpdir.join('extra.txt').write('')
+        modules, inputs = rerun.watched_files(entry, ['--other', 'extra.txt'])
+    assert modules == {str(script), str(root.join('helper.py'))}
+    assert inputs == {str(tmpdir.join('data.csv')), str(tmpdir.join('extra.txt'))}
+
+
+def test_reload_modules(tmpdir, monkeypatch):
+    """only the modules of the changed files are reloaded"""
+    tmpdir.join('rerun_helper.py').write('VALUE = 1\n')
+    monkeypatch.syspath_prepend(str(tmpdir))
+    import rerun_helper
+    try:
+        tmpdir.join('rerun_helper.py').write('VALUE = 22\n')
+        rerun.reload_modules({str(tmpdir.join('other.py'))})
+        assert rerun_helper.VALUE == 1
+        rerun.reload_modules({str(tmpdir.join('rerun_helper.py'))})
+        assert rerun_helper.VALUE == 22
+    finally:
+        del sys.modules['rerun_helper']
@@ -0,0 +1,103 @@
+"""
+Tests to check some functionality of `resultcache`
+"""
+from .. import cachedir
+from .. import resultcache
+
+
+def make_script(tmpdir):
+    """script importing a local helper module"""
+    package = tmpdir.mkdir('scripts')
+    package.join('helper.py').write('SCALE = 1\n')
+    script = package.join('plot.py')
+    script.write('from . import helper\nimport os\nPYPLOT_INPUTS = "*.dat"\n')
+    return package, script
+
+
+def test_key_depends_on_sources_and_inputs(tmpdir):
+    """changing the helper, arguments or inputs changes the key"""
+    package, script = make_script(tmpdir)
+    assert resultcache.local_modules(str(script), []) == {str(package.join('helper.py'))}
+    with tmpdir.as_cwd():
+        key = resultcache.result_key(str(script), {'start': 1})
+        assert key == resultcache.result_key(str(script), {'start': 1})
+        assert key != resultcache.result_key(str(script), {'start': 2})
+        tmpdir.join('input.dat').write('1 2 3')
+        with_input = resultcache.result_key(str(script), {'start': 1})
+        assert with_input != key
+        tmpdir.join('input.dat').write('1 2 4')
+        assert resultcache.result_key(str(script), {'start': 1}) != with_input
+        package.join('helper.py').write('SCALE = 2\n')
+        assert resultcache.result_key(str(script), {'start': 1}) not in (key, with_input)
+
+
+def test_outputs_are_restored(tmpdir):
+    """the second call restores the output instead of running"""
+    cache = resultcache.ResultCache(str(tmpdir.join('cache')), max_size=1024)
+    work = tmpdir.mkdir('work')
+    calls = []
+
+    def run(args):
+        calls.append(args)
+        work.mkdir('figures').join('plot.txt').write('figure')
+    with work.as_cwd():
+        cache.call(run, 1, 'key')
+        work.join('figures').remove()
+        cache.call(run, 1, 'key')
+    assert calls == [1]
+    assert work.join('figures', 'plot.txt').read() == 'figure'
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_are_evicted(tmpdir):
+    """results exceeding the maximal size are removed, oldest first"""
+    cache = resultcache.ResultCache(str(tmpdir.join('cache')), max_size=25)
+    work = tmpdir.mkdir('work')
+    for key in ('first', 'second', 'third'):
+        work.join(key).write('x' * 10)
+        cache.store(key, str(work), [key])
+        tmpdir.join('cache', key, cachedir.META_FILE).setmtime(
+            {'first': 1, 'second': 3, 'third': 2}[key])
+    cache.evict()
+    assert sorted(key for _, _, key in cache.entries()) == ['second', 'third']
+
+
+def test_refresh_replaces_result(tmpdir):
+    """storing an existing key replaces its files"""
+    cache = resultcache.ResultCache(str(tmpdir.join('cache')), max_size=1024)
+    work = tmpdir.mkdir('work')
+    work.join('plot.txt').write('old')
+    cache.store('key', str(work), ['plot.txt'])
+    work.join('plot.txt').write('new')
+    cache.store('key', str(work), ['plot.txt'])
+    work.join('plot.txt').remove()
+    assert cache.restore('key', str(work)) == ['plot.txt']
+    assert work.join('plot.txt').read() == 'new'
+    assert [key for _, _, key in cache.entries()] == ['key']
+
+
+def test_snapshot_is_bounded(tmpdir):
+    """only shallow files or the files matching the output patterns are seen"""
+    tmpdir.ensure('top.txt')
+    tmpdir.ensure('a', 'b', 'shallow.txt')
+    tmpdir.ensure('a', 'b', 'c', 'deep.txt')
+    tmpdir.ensure('.hidden', 'file.txt')
+    shallow = resultcache.snapshot(str(tmpdir), depth=2)
+    assert sorted(shallow) == ['a/b/shallow.txt', 'top.txt']
+    matched = resultcache.snapshot(str(tmpdir), patterns=['a/**/*.txt'])
+    assert sorted(matched) == ['a/b/c/deep.txt', 'a/b/shallow.txt']
+
+
+def test_pending_output_is_flushed(tmpdir):
+    """files written by `flush` are stored, nothing if it reports failures"""
+    cache = resultcache.ResultCache(str(tmpdir.join('cache')), max_size=1024)
+    work = tmpdir.mkdir('work')
+
+    def flush(failures):
+        work.join('figure.png').write('figure')
+        return failures
+    with work.as_cwd():
+        assert cache.call(lambda args: None, None, 'failed', flush=lambda: flush(1)) == 1
+        assert cache.call(lambda args: None, None, 'exported', flush=lambda: flush(0)) == 0
+    assert [key for _, _, key in cache.entries()] == ['exported']
+    assert cache.meta('exported')['outputs'] == ['figure.png']
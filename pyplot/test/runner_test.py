@@ -0,0 +1,52 @@
+"""
+Tests to check some functionality of `runner`
+"""
+import sys
+
+import pytest
+
+from .. import runner
+
+
+@pytest.fixture
+def scripts(tmpdir):
+    """script directory with a manifest and a runner using it"""
+    from ..configure import Updater
+    root = tmpdir.mkdir('runner_scripts')
+    root.join('count.py').write(
+        'import argparse\n'
+        'CALLS = []\n'
+        'def get_parser(add_help=True):\n'
+        '    parser = argparse.ArgumentParser(add_help=add_help)\n'
+        '    parser.add_argument("-n", type=int, default=1)\n'
+        '    return parser\n'
+        'def main(args):\n'
+        '    CALLS.append(args.n)\n'
+        '    return CALLS\n'
+    )
+    root.join('argv.py').write('import sys\ndef main():\n    return list(sys.argv)\n')
+    script_manifest = runner.manifest_.Manifest(
+        Updater.describe_dir(str(root), str(root), Updater.get_modules(str(root))))
+    script_manifest.save(str(tmpdir.join('manifest.json')))
+    yield root, runner.Runner([str(root)], [], str(tmpdir.join('manifest.json')))
+    for name in [name for name in sys.modules if name.startswith('runner_scripts')]:
+        del sys.modules[name]
+
+
+def test_modules_are_reused(scripts):
+    """the module is kept until its source changes"""
+    root, script_runner = scripts
+    assert script_runner.run('count', ['-n', '2']) == [2]
+    assert script_runner.run('count') == [2, 1]
+    root.join('count.py').write(root.join('count.py').read().replace('n)', 'n * 10)'))
+    assert script_runner.run('count', ['-n', '2']) == [20]
+
+
+def test_argv_restored(scripts):
+    """scripts without parser see the arguments only while running"""
+    _, script_runner = scripts
+    old_argv = list(sys.argv)
+    assert script_runner.run('argv', ['a', 'b']) == ['argv', 'a', 'b']
+    assert sys.argv == old_argv
+    with pytest.raises(runner.UnknownScript):
+        script_runner.run('missing')
@@ -0,0 +1,22 @@
+"""
+Tests to check some functionality of `server`
+"""
+import os
+import socket
+
+from .. import server
+
+
+def test_message_with_fds():
+    """Messages and file descriptors are passed over the socket"""
+    left, right = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    read_fd, write_fd = os.pipe()
+    with left, right:
+        message = {'argv': ['toyplot', '-s', '3'], 'env': {'KEY': 'x' * 100000}}
+        server.send_message(left, message, fds=(write_fd,))
+        received, fds = server.recv_message(right, maxfds=3)
+    assert received == message
+    os.write(fds[0], b'ok')
+    assert os.read(read_fd, 2) == b'ok'
+    for fd in fds + [read_fd, write_fd]:
+        os.close(fd)
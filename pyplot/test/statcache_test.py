@@ -0,0 +1,37 @@
+"""
+Tests to check some functionality of `statcache`
+"""
+from .. import statcache
+
+
+def test_unchanged_files_are_reused(tmpdir):
+    """Files are only checked again if their stat changed"""
+    script = tmpdir.join('script.py')
+    script.write('def main():\n    pass\n')
+    filename = str(tmpdir.join('cache.json'))
+    calls = []
+
+    def check(name):
+        calls.append(name)
+        return True
+
+    cache = statcache.StatCache()
+    assert cache.is_valid(str(script), check) == (True, False)
+    cache.save(filename)
+    cache = statcache.StatCache.load(filename)
+    assert cache.is_valid(str(script), check) == (True, True)
+    assert len(calls) == 1
+    assert (cache.reused, cache.rescanned) == (1, 0)
+
+
+def test_unchanged_directories(tmpdir):
+    """The listing of unchanged directories is taken from the cache"""
+    scripts = tmpdir.mkdir('scripts')
+    scripts.join('script.py').write('')
+    filename = str(tmpdir.join('cache.json'))
+    cache = statcache.StatCache()
+    first = cache.listdir(str(scripts))
+    cache.save(filename)
+    cache = statcache.StatCache.load(filename)
+    assert cache.listdir(str(scripts)) == first
+    assert str(scripts) in cache.unchanged_dirs
@@ -0,0 +1,80 @@
+"""
+Tests to check some functionality of `sweep`
+"""
+import argparse
+import os
+
+import pytest
+
+from .. import batch
+from .. import sweep
+
+
+@pytest.mark.parametrize("spec, values", [
+    ('0:30:10', ['0', '10', '20']),
+    ('0:1:0.5', ['0.0', '0.5']),
+    ('a,b', ['a', 'b']),
+    ('3', ['3']),
+])
+def test_expand_values(spec, values):
+    """ranges exclude the stop value"""
+    assert sweep.expand_values(spec) == values
+
+
+def test_expand_grid():
+    """the grid is the cartesian product of its axes"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--start', type=int)
+    parser.add_argument('--log', action='store_true')
+    points = sweep.expand_grid(parser, ['start=0:2', 'log=true,false'])
+    assert points == [
+        ('start=0 log=true', ['-s', '0', '--log']),
+        ('start=0 log=false', ['-s', '0']),
+        ('start=1 log=true', ['-s', '1', '--log']),
+        ('start=1 log=false', ['-s', '1']),
+    ]
+    with pytest.raises(sweep.SweepError):
+        sweep.expand_grid(parser, ['stop=1,2'])
+
+
+@pytest.mark.parametrize("name", ['help', 'h', 'version'])
+def test_exiting_arguments_are_rejected(name):
+    """help and version can't be swept"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version', action='version', version='1.0')
+    with pytest.raises(sweep.SweepError):
+        sweep.expand_grid(parser, [name + '=true'])
+
+
+def test_split_command():
+    """the commands reaching a sub-parser name the script"""
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers()
+    namespace = subparsers.add_parser('sub1').add_subparsers()
+    namespace.add_parser('toyplot')
+    assert sweep.split_command(parser, ['sub1', 'toyplot', 'sub1', '-s', '3']) == (
+        ['sub1', 'toyplot'], ['sub1', '-s', '3'])
+    assert sweep.split_command(parser, ['sub1']) == (['sub1'], [])
+    with pytest.raises(sweep.SweepError):
+        sweep.split_command(parser, ['toyplot'])
+    args = sweep.get_parser().parse_args(['-g', 'a=1,2', '-g', 'b=3', 'sub1', 'toyplot', '-s'])
+    assert (args.grid, args.command) == (['a=1,2', 'b=3'], ['sub1', 'toyplot', '-s'])
+
+
+def fake_job(argv):
+    """kill the worker for the point `crash`"""
+    if 'crash' in argv:
+        os._exit(1)
+    return 0, ' '.join(argv), '', 0., 0.
+
+
+def test_dead_worker_fails_only_its_point(monkeypatch, capsys):
+    """the points after one killing its worker run in a new pool"""
+    monkeypatch.setattr(batch, 'load_parser', lambda: None)
+    monkeypatch.setattr(batch, 'run_job', fake_job)
+    points = [(label, [label]) for label in ('a', 'crash', 'b', 'c')]
+    progress = sweep.run_sweep(['plot'], points, jobs=1)
+    assert (progress.done, progress.failed) == (4, 1)
+    out, err = capsys.readouterr()
+    assert 'crash: failed' in out and 'plot c' in out
+    assert 'worker process died' in err
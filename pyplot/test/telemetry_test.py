@@ -0,0 +1,26 @@
+"""
+Tests to check some functionality of `telemetry`
+"""
+from .. import telemetry
+
+
+def test_store_is_bounded(tmpdir):
+    """the store keeps only its newer half once it is too large"""
+    filename = str(tmpdir.join('telemetry.jsonl'))
+    for index in range(100):
+        telemetry.append({'index': index}, filename=filename, max_size=1000)
+    records = telemetry.read(filename)
+    assert tmpdir.join('telemetry.jsonl').size() <= 1000
+    assert records[-1] == {'index': 99}
+    assert [item['index'] for item in records] == list(range(records[0]['index'], 100))
+
+
+def test_summarize():
+    """percentiles and trend are computed per script"""
+    records = [{'script': 'plot', 'wall': wall, 'status': 0, 'rss': 10.}
+               for wall in (1., 1., 2., 2.)]
+    records.append({'script': 'other', 'wall': 0.5, 'status': 1, 'rss': None})
+    plot, other = telemetry.summarize(records)
+    assert (plot['script'], plot['runs'], plot['p50'], plot['p95']) == ('plot', 4, 1., 2.)
+    assert plot['trend'] == 1.
+    assert (other['failures'], other['trend']) == (1, None)
@@ -0,0 +1,50 @@
+"""
+Tests to check some functionality of `walker`
+"""
+from .. import walker
+
+
+def test_ignore_rules():
+    """Check the supported subset of the gitignore syntax"""
+    rules = walker.IgnoreRules().extend(['data/', '*.dat', '/sub/raw', '!keep.dat'])
+    assert rules.ignored('data', True)
+    assert not rules.ignored('data', False)
+    assert rules.ignored('sub/file.dat', False)
+    assert not rules.ignored('keep.dat', False)
+    assert rules.ignored('sub/raw', True)
+    assert not rules.ignored('other/sub/raw', True)
+
+
+def test_walk_prunes(tmpdir):
+    """Ignored and hidden directories are not descended into"""
+    for dirname in ('scripts/sub', 'scripts/data/deep', 'scripts/.git', 'other'):
+        tmpdir.ensure(dirname, dir=True)
+    tmpdir.join('scripts', 'sub', 'plot.py').write('')
+    tmpdir.join('scripts', '.pyplotignore').write('# data files\ndata/\n')
+    top = str(tmpdir.join('scripts'))
+    walks = walker.Walker(exclude=[]).walk_all([top, str(tmpdir.join('other'))])
+    assert [dirnames for _, dirnames, _ in walks[top]] == [['sub'], []]
+    assert walks[top][1][2] == ['plot.py']
+    assert len(walks[str(tmpdir.join('other'))]) == 1
+    script_walker = walker.Walker(exclude=[])
+    assert not script_walker.is_pruned([top], str(tmpdir.join('scripts', 'sub')))
+    assert script_walker.is_pruned([top], str(tmpdir.join('scripts', 'data', 'deep')))
+    assert script_walker.is_pruned([top], str(tmpdir.join('scripts', '.git')))
+    assert script_walker.is_pruned([top], str(tmpdir.join('other')))
+
+
+def test_unreadable_directories_are_skipped(tmpdir):
+    """missing tops and directories which can't be listed are left out"""
+    tmpdir.ensure('scripts', 'readable', dir=True)
+    tmpdir.ensure('scripts', 'unreadable', 'deep', dir=True)
+    unreadable = str(tmpdir.join('scripts', 'unreadable'))
+
+    def listdir(dirname):
+        if dirname == unreadable:
+            raise PermissionError(13, 'Permission denied', dirname)
+        return walker.scandir(dirname)
+    top, missing = str(tmpdir.join('scripts')), str(tmpdir.join('missing'))
+    walks = walker.Walker(exclude=[], listdir=listdir).walk_all([top, missing])
+    readable = str(tmpdir.join('scripts', 'readable'))
+    assert [dirpath for dirpath, _, _ in walks[top]] == [top, readable]
+    assert walks[missing] == []
@@ -0,0 +1,45 @@
+"""
+Tests to check some functionality of `watcher`
+"""
+import os
+
+import pytest
+
+from .. import watcher
+
+
+@pytest.mark.parametrize("poll", [True, False])
+def test_observer_reports_changes(tmpdir, poll):
+    """Changed directories are reported, generated files are ignored"""
+    observer = watcher.get_observer([str(tmpdir)], poll=poll, interval=0.01)
+    try:
+        tmpdir.join('__init__.py').write('')
+        assert observer.read(timeout=0.1) == set()
+        tmpdir.join('script.py').write('def main():\n    pass\n')
+        assert observer.read(timeout=1.) == {str(tmpdir)}
+    finally:
+        observer.close()
+
+
+@pytest.mark.parametrize("poll", [True, False])
+def test_pruned_directories_are_not_watched(tmpdir, poll):
+    """new directories are filtered like the walker does"""
+    is_pruned = lambda path: os.path.basename(path) == 'data'
+    observer = watcher.get_observer([str(tmpdir)], poll=poll, interval=0.01,
+                                    is_pruned=is_pruned)
+    try:
+        tmpdir.mkdir('data')
+        tmpdir.mkdir('sub')
+        assert observer.read(timeout=1.) == {str(tmpdir), str(tmpdir.join('sub'))}
+        tmpdir.join('data', 'script.py').write('')
+        assert str(tmpdir.join('data')) not in observer.read(timeout=0.1)
+    finally:
+        observer.close()
+
+
+def test_inotify_closes_on_failure(tmpdir):
+    """the inotify descriptor doesn't leak if a directory can't be watched"""
+    descriptors = len(os.listdir('/proc/self/fd'))
+    with pytest.raises(OSError):
+        watcher.InotifyObserver([str(tmpdir.join('missing'))])
+    assert len(os.listdir('/proc/self/fd')) == descriptors
@@ -0,0 +1,167 @@
+"""Concurrent directory walker shared by `configure` and `pyplot`
+
+Directories are scanned with `os.scandir` on a thread pool, which hides the
+latency of network file systems. Directories starting with `.`, directories
+matching the `exclude` list of the configuration and patterns of
+`.pyplotignore` files are pruned before descending into them.
+
+`.pyplotignore` files use a subset of the gitignore syntax: one `fnmatch`
+pattern per line, `#` starts a comment, a trailing `/` only matches
+directories, patterns containing a `/` are matched against the path relative
+to the ignore file, others against the name, and a leading `!` re-includes
+a path.
+"""
+from __future__ import print_function, absolute_import
+
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from fnmatch import fnmatchcase
+
+from . import common
+
+IGNORE_FILE = '.pyplotignore'
+DEFAULT_EXCLUDE = ['__pycache__/']
+
+
+def scandir(dirname):
+    """Return `(dirnames, filenames)` of `dirname`"""
+    dirnames, filenames = [], []
+    for entry in os.scandir(dirname):
+        if entry.is_dir():
+            dirnames.append(entry.name)
+        else:
+            filenames.append(entry.name)
+    return dirnames, filenames
+
+
+class IgnoreRules(object):
+    """Immutable list of ignore patterns, later patterns take precedence"""
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)
+
+    @staticmethod
+    def parse(lines, base=''):
+        """Return the rules of the pattern `lines` relative to `base`"""
+        rules = []
+        for line in lines:
+            pattern = line.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negate = pattern.startswith('!')
+            pattern = pattern.lstrip('!')
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            anchored = '/' in pattern
+            rules.append((base, pattern.lstrip('/'), negate, dir_only, anchored))
+        return rules
+
+    def extend(self, lines, base=''):
+        """Return new rules with the patterns `lines` added"""
+        return IgnoreRules(self.rules + tuple(self.parse(lines, base)))
+
+    def ignored(self, relpath, is_dir):
+        """Return true if the path `relpath` relative to the root is ignored"""
+        ignored = False
+        name = relpath.rpartition('/')[-1]
+        for base, pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not relpath.startswith(base + '/'):
+                    continue
+                path = relpath[len(base) + 1:]
+            else:
+                path = relpath
+            if fnmatchcase(path if anchored else name, pattern):
+                ignored = not negate
+        return ignored
+
+
+class Walker(object):
+    """Walk directory trees concurrently
+
+    *listdir* returns `(dirnames, filenames)` of a directory, it can be
+    replaced e.g. by `statcache.StatCache.listdir`.
+    """
+
+    def __init__(self, exclude=None, listdir=scandir, max_workers=None):
+        if exclude is None:
+            exclude = common.EXCLUDE
+        self.rules = IgnoreRules().extend(DEFAULT_EXCLUDE + list(exclude))
+        self.listdir = listdir
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    def _scan(self, top, relpath, rules):
+        """Scan a single directory and prune its content
+
+        Return `None` if the directory can't be read."""
+        dirpath = os.path.join(top, *relpath.split('/')) if relpath else top
+        try:
+            dirnames, filenames = self.listdir(dirpath)
+            if IGNORE_FILE in filenames:
+                with open(os.path.join(dirpath, IGNORE_FILE), 'r') as file_:
+                    rules = rules.extend(file_.readlines(), relpath)
+        except OSError:
+            return None
+        prefix = relpath + '/' if relpath else ''
+        dirnames = sorted(name for name in dirnames if not name.startswith('.')
+                          and not rules.ignored(prefix + name, True))
+        filenames = sorted(name for name in filenames
+                           if not rules.ignored(prefix + name, False))
+        return dirpath, relpath, dirnames, filenames, rules
+
+    def walk_all(self, tops):
+        """Return a dictionary mapping each of `tops` on its walk
+
+        A walk is a list of `(dirpath, dirnames, filenames)` in top-down order
+        like `os.walk` yields it. All trees are scanned on the same pool.
+        Like `os.walk`, directories which can't be read are skipped, the walk
+        of a missing top is empty.
+        """
+        results = {top: [] for top in tops}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._scan, top, '', self.rules): top
+                       for top in results}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    top = pending.pop(future)
+                    scanned = future.result()
+                    if scanned is None:
+                        continue
+                    dirpath, relpath, dirnames, filenames, rules = scanned
+                    results[top].append((relpath, dirpath, dirnames, filenames))
+                    prefix = relpath + '/' if relpath else ''
+                    for name in dirnames:
+                        pending[executor.submit(self._scan, top, prefix + name, rules)] = top
+        return {top: [item[1:] for item in sorted(walk, key=lambda item: item[0].split('/'))]
+                for top, walk in results.items()}
+
+    def walk(self, top):
+        """Return the walk of `top`, see `walk_all`"""
+        return self.walk_all([top])[top]
+
+    def is_pruned(self, tops, dirpath):
+        """Return true if walks of `tops` don't descend into the directory `dirpath`
+
+        The rules of the `.pyplotignore` files on the way from the top
+        containing `dirpath` are read like the walk does."""
+        dirpath = os.path.abspath(dirpath)
+        containing = [top for top in map(os.path.abspath, tops)
+                      if dirpath == top or dirpath.startswith(os.path.join(top, ''))]
+        if not containing:
+            return True
+        top = max(containing, key=len)
+        parts = [] if dirpath == top else os.path.relpath(dirpath, top).split(os.sep)
+        rules = self.rules
+        for depth, name in enumerate(parts):
+            parent = os.path.join(top, *parts[:depth])
+            try:
+                with open(os.path.join(parent, IGNORE_FILE), 'r') as file_:
+                    rules = rules.extend(file_.readlines(), '/'.join(parts[:depth]))
+            except (IOError, OSError):
+                pass
+            if name.startswith('.') or rules.ignored('/'.join(parts[:depth + 1]), True):
+                return True
+        return False
@@ -0,0 +1,207 @@
+"""Observe directories for changes of scripts
+
+On Linux `inotify` is used through `ctypes`, on other systems or if it is not
+available the directories are polled. Both observers report the set of
+directories whose content changed; `watch` debounces these reports.
+"""
+from __future__ import print_function, absolute_import, division
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_relevant(name):
+    """Return true if a change of the file `name` can change the scripts"""
+    return (not name.startswith('.') and name != '__init__.py'
+            and name != '__pycache__' and not name.endswith(('.pyc', '~')))
+
+
+class InotifyObserver(object):
+    """Observer using the Linux `inotify` API
+
+    New directories for which `is_pruned(path)` is true are not watched."""
+
+    def __init__(self, directories, is_pruned=None):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.is_pruned = is_pruned
+        self.directories = {}
+        try:
+            for dirname in directories:
+                self.add(dirname)
+        except BaseException:
+            self.close()
+            raise
+
+    def add(self, dirname):
+        """Watch `dirname` (not recursively)"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirname), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed', dirname)
+        self.directories[wd] = dirname
+
+    def read(self, timeout=None):
+        """Return the set of changed directories, empty after `timeout`"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.directories.values())
+                continue
+            dirname = self.directories.get(wd)
+            if dirname is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.directories[wd]
+                continue
+            if mask & IN_DELETE_SELF:
+                changed.add(dirname)
+                continue
+            if not is_relevant(name):
+                continue
+            changed.add(dirname)
+            path = os.path.join(dirname, name)
+            if (mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO)
+                    and not (self.is_pruned and self.is_pruned(path))):
+                try:
+                    self.add(path)
+                except OSError:
+                    pass
+                else:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingObserver(object):
+    """Observer comparing the stat of the directories and their scripts
+
+    New directories for which `is_pruned(path)` is true are not watched."""
+
+    def __init__(self, directories, interval=1., is_pruned=None):
+        self.interval = interval
+        self.is_pruned = is_pruned
+        self.snapshots = {}
+        for dirname in directories:
+            self.add(dirname)
+
+    @staticmethod
+    def snapshot(dirname):
+        """Return the stat information of `dirname` and its relevant files"""
+        try:
+            state = {}
+            for entry in os.scandir(dirname):
+                if is_relevant(entry.name):
+                    stat = entry.stat()
+                    state[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+        return state
+
+    def add(self, dirname):
+        """Watch `dirname` (not recursively)"""
+        self.snapshots[dirname] = self.snapshot(dirname)
+
+    def read(self, timeout=None):
+        """Return the set of changed directories, empty after `timeout`"""
+        start = time.monotonic()
+        while True:
+            changed = set()
+            for dirname, previous in list(self.snapshots.items()):
+                current = self.snapshot(dirname)
+                if current == previous:
+                    continue
+                changed.add(dirname)
+                if current is None:
+                    del self.snapshots[dirname]
+                    continue
+                self.snapshots[dirname] = current
+                for name in set(current) - set(previous or ()):
+                    path = os.path.join(dirname, name)
+                    if (os.path.isdir(path) and path not in self.snapshots
+                            and not (self.is_pruned and self.is_pruned(path))):
+                        self.add(path)
+                        changed.add(path)
+            if changed:
+                return changed
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    return changed
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        self.snapshots.clear()
+
+
+def get_observer(directories, poll=False, interval=1., is_pruned=None):
+    """Return an `InotifyObserver` if possible, else a `PollingObserver`"""
+    if not poll:
+        try:
+            return InotifyObserver(directories, is_pruned)
+        except (OSError, AttributeError) as exc:
+            if getattr(exc, 'errno', None) == errno.ENOSPC:
+                print('inotify watch limit reached, falling back to polling')
+    return PollingObserver(directories, interval, is_pruned)
+
+
+def watch(observer, callback, delay=0.5, max_delay=5.):
+    """Call `callback(changed_directories)` for debounced changes
+
+    Changes are collected until no new change occurred for `delay` seconds,
+    but at most for `max_delay` seconds. Runs until interrupted.
+    """
+    pending = set()
+    first = last = None
+    while True:
+        if pending:
+            now = time.monotonic()
+            timeout = max(0., min(last + delay, first + max_delay) - now)
+        else:
+            timeout = None
+        changed = observer.read(timeout)
+        now = time.monotonic()
+        if changed:
+            if not pending:
+                first = now
+            pending.update(changed)
+            last = now
+            if now - first < max_delay:
+                continue
+        if pending:
+            callback(pending)
+            pending = set()
@@ -59,6 +59,7 @@ setup(name='pyplot',
       entry_points={
           'console_scripts': [
               'pyplot = pyplot.__main__:main',
+              'pyplot-client = pyplot.client:main',
           ],
       },
       tests_require=['pytest'],